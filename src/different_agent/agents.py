@@ -1,12 +1,15 @@
 from __future__ import annotations
 
-from typing import Any, Literal
+import asyncio
+import functools
+import json
+from collections import OrderedDict
+from collections.abc import Callable
+from importlib import resources
+from typing import TYPE_CHECKING, Any, Literal
 
-from deepagents import create_deep_agent
-from langchain.agents.structured_output import AutoStrategy
-from langchain_core.language_models import BaseChatModel
-from langgraph.cache.base import BaseCache
 from pydantic import BaseModel, Field, model_validator
+from pydantic.dataclasses import dataclass as pydantic_dataclass
 
 from different_agent.git_tools import (
     ast_grep,
@@ -16,6 +19,7 @@ from different_agent.git_tools import (
     git_ls_files,
     git_recent_commits,
     git_show_commit,
+    git_show_commits_bulk,
     git_show_file,
 )
 from different_agent.github_tools import (
@@ -24,20 +28,28 @@ from different_agent.github_tools import (
     github_fetch_pr,
     github_fetch_pr_comments,
     github_fetch_pr_files,
+    github_fetch_prs_bulk,
     github_recent_issues,
     github_recent_prs,
 )
 
+if TYPE_CHECKING:
+    from langchain.agents.structured_output import AutoStrategy
+    from langchain_core.language_models import BaseChatModel
+    from langgraph.cache.base import BaseCache
+
 FINDING_SCHEMA_VERSION = "v3"
 
 
-class EvidenceCommit(BaseModel):
+@pydantic_dataclass(slots=True, frozen=True)
+class EvidenceCommit:
     sha: str
     subject: str
     date: str
 
 
-class FindingEvidence(BaseModel):
+@pydantic_dataclass(slots=True, frozen=True)
+class FindingEvidence:
     commits: list[EvidenceCommit] = Field(default_factory=list)
     files_changed: list[str] = Field(default_factory=list)
     diff_snippets: list[str] = Field(default_factory=list)
@@ -86,157 +98,79 @@ class TargetAssessmentsResponse(BaseModel):
     assessments: list[TargetAssessment]
 
 
-INSPIRATION_AGENT_PROMPT = f"""You are a security engineer, and you analyze a codebase and extract structured “fix findings” or "vulnerability fix findings"
-
-The goal is to extract all bug fixes that may have addressed previously introduced security issues, ranging from low to high-severity: whatever its severity.
-
-Inputs:
-- A local git repository path (it will have a .git directory).
-
-The user message will include:
-- inspiration_repo_path: <path>
-- since_days: <int>
-- max_commits: <int>
-- max_patch_lines: <int>
-- include_github: <true/false>
-- max_issues: <int>
-- max_prs: <int>
-- from_pr: <int or null>
-- to_pr: <int or null>
-
-Goal:
-- Identify recent bug fixes or vulnerability fixes from commit history.
-- If GitHub data is available, also use recent Issues/PRs and (when useful) fetch Issue/PR content for context.
-- Produce a JSON array of findings (schema: {FINDING_SCHEMA_VERSION}) with solid evidence.
-- Capture enough idea-level detail so a separate agent can check for similar concepts in a target repo (not 1:1
-  signature matches).
-
-Hard rules:
-- Use the provided git tools to inspect commits.
-- Prefer evidence from diffs over speculation.
-- Skip docs-only, formatting-only, test-only, or pure refactor changes unless the diff shows an actual bug fix.
-- Commit message alone is never sufficient evidence of a fix. Investigate the difference of lines.
-- Do NOT paste entire diffs into the JSON. Keep diff_snippets short.
-- If you include GitHub issues/PRs, include their links in evidence.links.
-- Be conservative: if you can't justify severity, set severity="unknown".
-- If kind="bug" and severity!="unknown":
-  - main_file must be set to the single most relevant file path for the fix (usually pick 1 entry from evidence.files_changed).
-  - exploit_risk must be a short paragraph explaining how an attacker could exploit the bug and what they could gain (preconditions + impact). Keep it similar length to root_cause/fix_summary.
-- root_cause must describe the generalized mechanism (unsafe pattern + conditions), not just the local symbol name.
-- fix_summary must describe the conceptual mitigation, not only the exact code change.
-- tags should include short idea-level keywords to help variant matching (e.g. "ambiguous-encoding",
-  "length-prefix", "hash-collision", "variable-length-bytes").
-
-Output:
-- Write the JSON to /outputs/findings.json
-- The file must be valid JSON (no trailing commas, no comments).
-- Also return a structured response with top-level key "findings" that matches the schema.
-
-Finding fields (schema {FINDING_SCHEMA_VERSION}):
-- id (string)
-- kind ("bug" | "vulnerability" | "hardening")
-- title (string)
-- severity ("low" | "medium" | "high" | "critical" | "unknown")
-- main_file (string|null)  # required when kind="bug" and severity!="unknown"
-- exploit_risk (string|null)  # required when kind="bug" and severity!="unknown"
-- root_cause (string)
-- fix_summary (string)
-- evidence {{
-    commits: [{{sha, subject, date}}],
-    files_changed: [string],
-    diff_snippets: [string],
-    links: [string]
-  }}
-- tags: [string]
-
-Workflow (recommended):
-1) Use write_todos to plan.
-2) Treat inspiration_repo_path as repo_path for all git tools.
-3) If git_recent_commits is available, call git_recent_commits(repo_path, since_days, max_count).
-4) If git_show_commit is available, call git_show_commit(repo_path, sha, max_patch_lines) for likely fixes and extract evidence.
-5) Try to resolve GitHub owner/repo using git_github_repo(repo_path). If that succeeds, also call
-   github_recent_prs(owner, repo, since_days, max_prs, from_pr, to_pr) / github_recent_issues(owner, repo, since_days, max_issues)
-   for the same window (unless from_pr/to_pr is provided), then fetch details (github_fetch_pr / github_fetch_pr_files / github_fetch_issue)
-   only for the items that look like fixes. Use github_fetch_pr_comments to read review comments and
-   discussion when they may clarify the nature of a fix.
-   If include_github is false, skip all GitHub tools.
-6) Write /outputs/findings.json.
-"""
-
-
-TARGET_AGENT_PROMPT = f"""You analyze a target codebase for applicability of known findings.
-
-Role and objective:
-- You are a senior security judge focused on analyzing security fixes.
-- Your main goal is to decide whether each reported finding is a genuine security concern in the target repo
-  or a false positive. Be pragmatic and honest.
-
-Inputs:
-- A local git repository path (it will have a .git directory).
-- A findings JSON file at /inputs/findings.json (schema: {FINDING_SCHEMA_VERSION}).
-
-The user message will include:
-- target_repo_path: <path>
-
-Core instructions:
-- Use critical thinking for every finding. Assess factual accuracy AND whether any actual security risk exists.
-- Collect concrete evidence; consider edge and corner cases.
-- Use all available documentation, code, and descriptions to inform your judgment.
-- Read available documentation and code context (use git_show_file as needed).
-- If you create scratch files, use /tmp. Final output must still be written to /outputs/target_assessment.json.
-
-Goal:
-- For each finding, decide if it likely applies to the target codebase.
-- Produce a JSON array of assessments.
-
-Output:
-- Write the JSON to /outputs/target_assessment.json
-- Also return a structured response with top-level key "assessments" that matches the schema.
-
-Assessment fields:
-- finding_id
-- applies (true | false | "unknown")
-- confidence (0..1)
-- why (string)
-- evidence (object)
-- suggested_next_steps ([string])
-
-Verdict mapping:
-- applies=true => valid issue
-- applies=false => false positive
-- applies="unknown" => unknown
-- End each "why" with the exact words "valid issue", "false positive", or "unknown".
-
-Workflow (recommended):
-1) Read /inputs/findings.json.
-2) Treat target_repo_path as repo_path for all git tools.
-3) For each finding:
-   - Use git_grep(repo_path, ...) to search for the vulnerable pattern or key identifiers (prefer fixed-string searches
-     based on diff_snippets, file paths, function names, and error strings).
-   - If needed, use git_show_file(repo_path, file_path, ref="HEAD") to inspect context.
-   - Use git_diff(repo_path, ref_a, ref_b) to compare two refs when you need to see what changed between versions.
-   - Use ast_grep(repo_path, pattern, language) for structural code matching (e.g. find all calls to a function
-     with specific argument shapes, or match code patterns regardless of variable naming). This is more precise than
-     text grep for code patterns. ast_grep may not be installed; if it returns an error, fall back to git_grep.
-   - Use git_log_search(repo_path, pattern) to check if the target repo already has a commit that fixes
-     the same issue (search for keywords from the finding title or tags).
-   - Use git_ls_files(repo_path, path_prefix) to explore the project structure and find relevant source files.
-   - Decide applies=true/false/unknown with a confidence score.
-4) Write /outputs/target_assessment.json.
-"""
+@functools.cache
+def _response_strategy(schema: type[BaseModel]) -> AutoStrategy:
+    # Imported lazily: langchain.agents is heavy and not needed until an agent is built.
+    from langchain.agents.structured_output import AutoStrategy
 
+    return AutoStrategy(schema)
 
-def create_inspiration_agent(
+
+@functools.cache
+def _load_prompt(name: str) -> str:
+    text = (
+        resources.files("different_agent")
+        .joinpath("prompts", f"{name}.md")
+        .read_text(encoding="utf-8")
+    )
+    return text.replace("{schema_version}", FINDING_SCHEMA_VERSION)
+
+
+@functools.cache
+def _inspiration_prompt(include_commits: bool, include_issues: bool) -> str:
+    # Only describe the workflow steps whose tools are registered for this agent.
+    commits = _load_prompt("inspiration_commits") if include_commits else ""
+    issues = _load_prompt("inspiration_issues") if include_issues else ""
+    return (
+        _load_prompt("inspiration")
+        .replace("{commits_workflow}", commits)
+        .replace("{issues_workflow}", issues)
+    )
+
+
+_AGENT_CACHE_MAXSIZE = 8
+_AGENT_CACHE: OrderedDict[
+    tuple[str, int, int, bool, bool], tuple[BaseChatModel, BaseCache | None, Any]
+] = OrderedDict()
+
+
+def clear_agent_cache() -> None:
+    _AGENT_CACHE.clear()
+
+
+def _cached_agent(
+    kind: str,
     model: BaseChatModel,
-    cache: BaseCache | None = None,
-    *,
-    include_commits: bool = True,
-    include_issues: bool = True,
+    cache: BaseCache | None,
+    include_commits: bool,
+    include_issues: bool,
+    build: Callable[[], Any],
+) -> Any:
+    # Chat models and caches are not hashable, so key on identity. Each entry keeps strong
+    # references to its model/cache so their ids cannot be reused while the entry is alive.
+    key = (kind, id(model), id(cache), include_commits, include_issues)
+    entry = _AGENT_CACHE.get(key)
+    if entry is not None and entry[0] is model and entry[1] is cache:
+        _AGENT_CACHE.move_to_end(key)
+        return entry[2]
+    agent = build()
+    _AGENT_CACHE[key] = (model, cache, agent)
+    if len(_AGENT_CACHE) > _AGENT_CACHE_MAXSIZE:
+        _AGENT_CACHE.popitem(last=False)
+    return agent
+
+
+def _build_inspiration_agent(
+    model: BaseChatModel,
+    cache: BaseCache | None,
+    include_commits: bool,
+    include_issues: bool,
 ) -> Any:
     tools = [
         git_github_repo,
         github_recent_prs,
         github_fetch_pr,
+        github_fetch_prs_bulk,
         github_fetch_pr_files,
         github_fetch_pr_comments,
     ]
@@ -244,24 +178,100 @@ def create_inspiration_agent(
         tools = [
             git_recent_commits,
             git_show_commit,
+            git_show_commits_bulk,
             *tools,
         ]
     if include_issues:
         tools.extend([github_recent_issues, github_fetch_issue])
+    from deepagents import create_deep_agent
+
     return create_deep_agent(
         model=model,
         tools=tools,
-        system_prompt=INSPIRATION_AGENT_PROMPT,
-        response_format=AutoStrategy(FindingsResponse),
+        system_prompt=_inspiration_prompt(include_commits, include_issues),
+        response_format=_response_strategy(FindingsResponse),
         cache=cache,
     )
 
 
-def create_target_agent(model: BaseChatModel, cache: BaseCache | None = None) -> Any:
+def _build_target_agent(model: BaseChatModel, cache: BaseCache | None) -> Any:
+    from deepagents import create_deep_agent
+
     return create_deep_agent(
         model=model,
         tools=[git_grep, git_show_file, git_diff, ast_grep, git_log_search, git_ls_files],
-        system_prompt=TARGET_AGENT_PROMPT,
-        response_format=AutoStrategy(TargetAssessmentsResponse),
+        system_prompt=_load_prompt("target"),
+        response_format=_response_strategy(TargetAssessmentsResponse),
         cache=cache,
     )
+
+
+def create_inspiration_agent(
+    model: BaseChatModel,
+    cache: BaseCache | None = None,
+    *,
+    include_commits: bool = True,
+    include_issues: bool = True,
+) -> Any:
+    return _cached_agent(
+        "inspiration",
+        model,
+        cache,
+        include_commits,
+        include_issues,
+        lambda: _build_inspiration_agent(model, cache, include_commits, include_issues),
+    )
+
+
+def create_target_agent(model: BaseChatModel, cache: BaseCache | None = None) -> Any:
+    return _cached_agent(
+        "target",
+        model,
+        cache,
+        False,
+        False,
+        lambda: _build_target_agent(model, cache),
+    )
+
+
+def target_agent_payload(target_repo_path: str, finding: Any) -> dict[str, Any]:
+    # Each target run assesses one finding, provided as an in-memory file.
+    # DeepAgents' StateBackend expects FileData objects (content as list of lines). Compact
+    # json.dumps output escapes every control character, so it is always exactly one line.
+    finding_json = json.dumps(finding)
+    prompt = (
+        "Check this target repository for applicability of the finding in "
+        "/inputs/finding.json.\n\n"
+        f"target_repo_path: {target_repo_path}\n"
+    )
+    return {
+        "messages": [{"role": "user", "content": prompt}],
+        "files": {
+            "/inputs/finding.json": {
+                "content": [finding_json],
+                "created_at": "1970-01-01T00:00:00Z",
+                "modified_at": "1970-01-01T00:00:00Z",
+            }
+        },
+    }
+
+
+async def assess_findings_parallel(
+    agent: Any,
+    target_repo_path: str,
+    findings: list[Any],
+    max_concurrency: int = 8,
+) -> list[Any]:
+    """Assess each finding in its own target agent run, at most `max_concurrency` at a time.
+
+    Results are returned in `findings` order; a failed run yields its exception instead.
+    """
+    if max_concurrency <= 0:
+        raise ValueError("max_concurrency must be > 0")
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _assess(finding: Any) -> Any:
+        async with semaphore:
+            return await agent.ainvoke(target_agent_payload(target_repo_path, finding))
+
+    return await asyncio.gather(*(_assess(f) for f in findings), return_exceptions=True)
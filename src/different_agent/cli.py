@@ -1,43 +1,49 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import functools
 import json
 import logging
-import math
 import os
-from datetime import UTC, datetime
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
-from typing import Any, ClassVar, cast
+from typing import TYPE_CHECKING, Any, ClassVar, cast
 
-from dotenv import load_dotenv
-from langchain_core.callbacks import get_usage_metadata_callback
-from langgraph.cache.memory import InMemoryCache
-
-from different_agent.agents import create_inspiration_agent, create_target_agent
 from different_agent.config import AppConfig, load_config
-from different_agent.git_tools import get_analyzed_commit_count, reset_analyzed_commit_count
-from different_agent.github_tools import get_analyzed_pr_count, reset_analyzed_pr_count
-from different_agent.model import create_chat_model
-from different_agent.report import render_findings_html, render_target_assessment_html
+
+if TYPE_CHECKING:
+    from pydantic import TypeAdapter
 
 logger = logging.getLogger(__name__)
 
+_TARGET_MAX_CONCURRENCY = 8
+
+
+_LEVEL_COLORS = {
+    logging.DEBUG: "\x1b[36m",
+    logging.INFO: "\x1b[32m",
+    logging.WARNING: "\x1b[33m",
+    logging.ERROR: "\x1b[31m",
+    logging.CRITICAL: "\x1b[35m",
+}
+_COLOR_RESET = "\x1b[0m"
+
 
 class _ColorFormatter(logging.Formatter):
-    _COLORS: ClassVar[dict[int, str]] = {
-        logging.DEBUG: "\x1b[36m",
-        logging.INFO: "\x1b[32m",
-        logging.WARNING: "\x1b[33m",
-        logging.ERROR: "\x1b[31m",
-        logging.CRITICAL: "\x1b[35m",
+    # Colored level names are built once rather than on every record.
+    _COLORED_LEVELNAMES: ClassVar[dict[int, str]] = {
+        level: f"{color}{logging.getLevelName(level)}{_COLOR_RESET}"
+        for level, color in _LEVEL_COLORS.items()
     }
-    _RESET: ClassVar[str] = "\x1b[0m"
 
     def format(self, record: logging.LogRecord) -> str:
         original_level = record.levelname
-        color = self._COLORS.get(record.levelno)
-        if color:
-            record.levelname = f"{color}{original_level}{self._RESET}"
+        record.levelname = self._COLORED_LEVELNAMES.get(record.levelno, original_level)
         try:
             return super().format(record)
         finally:
@@ -50,10 +56,17 @@ def _ensure_git_repo(path: str) -> None:
         raise SystemExit(f"Not a git repository (missing .git directory): {path}")
 
 
-def _write_output_json(path: Path, content: str) -> None:
+@functools.cache
+def _json_adapter() -> TypeAdapter[Any]:
+    from pydantic import TypeAdapter
+
+    return TypeAdapter(Any)
+
+
+def _write_output_json(path: Path, data: Any) -> None:
+    # pydantic-core encodes straight to UTF-8 bytes; no str round-trip through json.dumps.
     path.parent.mkdir(parents=True, exist_ok=True)
-    parsed = json.loads(content)
-    path.write_text(json.dumps(parsed, indent=2, sort_keys=False) + "\n", encoding="utf-8")
+    path.write_bytes(_json_adapter().dump_json(data, indent=2) + b"\n")
 
 
 def _write_output_html(path: Path, html_content: str) -> None:
@@ -61,6 +74,17 @@ def _write_output_html(path: Path, html_content: str) -> None:
     path.write_text(html_content, encoding="utf-8")
 
 
+def _write_findings_outputs(
+    path: Path, findings: Any, render_html: Callable[[list[Any]], str] | None
+) -> None:
+    _write_output_json(path, findings)
+    logger.info("Wrote findings JSON to %s.", path)
+    if render_html is not None and isinstance(findings, list):
+        html_path = path.with_suffix(".html")
+        _write_output_html(html_path, render_html(findings))
+        logger.info("Wrote findings HTML report to %s.", html_path)
+
+
 def _output_suffix(now: datetime | None = None) -> str:
     return (now or datetime.now(UTC)).strftime("%m-%d_%H-%M")
 
@@ -82,10 +106,13 @@ def _extract_state_file(result: dict, file_path: str) -> str | None:
     file_data = files.get(file_path)
     if not file_data:
         return None
-    content_lines = file_data.get("content")
-    if not isinstance(content_lines, list):
+    content = file_data.get("content")
+    # DeepAgents stores file content as a list of lines; accept an already-joined string too.
+    if isinstance(content, str):
+        return content
+    if not isinstance(content, list):
         return None
-    return "\n".join(str(line) for line in content_lines)
+    return "\n".join(map(str, content))
 
 
 def _structured_response_to_list(structured_response: Any, key: str) -> list[Any] | None:
@@ -105,6 +132,42 @@ def _structured_response_to_list(structured_response: Any, key: str) -> list[Any
     return None
 
 
+def _collect_assessments(findings: list[Any], results: list[Any]) -> list[Any]:
+    assessments: list[Any] = []
+    failures = 0
+    for finding, result in zip(findings, results, strict=True):
+        finding_id = finding.get("id") if isinstance(finding, dict) else None
+        if isinstance(result, BaseException):
+            logger.warning("Target assessment failed for finding %s: %s.", finding_id, result)
+            failures += 1
+            continue
+        structured = _structured_response_to_list(result.get("structured_response"), "assessments")
+        if structured is not None:
+            assessments.extend(structured)
+            continue
+        assessment_json = _extract_state_file(result, "/outputs/target_assessment.json")
+        if assessment_json is None:
+            logger.warning(
+                "Target agent did not write /outputs/target_assessment.json for finding %s.",
+                finding_id,
+            )
+            failures += 1
+            continue
+        try:
+            parsed = json.loads(assessment_json)
+        except json.JSONDecodeError as exc:
+            logger.warning("Invalid target assessment JSON for finding %s: %s.", finding_id, exc)
+            failures += 1
+            continue
+        if isinstance(parsed, list):
+            assessments.extend(parsed)
+        else:
+            assessments.append(parsed)
+    if findings and failures == len(findings):
+        raise SystemExit("Target agent failed for every finding.")
+    return assessments
+
+
 def _default_config_path(cli_value: str | None) -> Path:
     if cli_value:
         return Path(cli_value)
@@ -114,6 +177,32 @@ def _default_config_path(cli_value: str | None) -> Path:
     return candidate  # defaults (even if missing)
 
 
+def _since_days_from_date(raw_since_date: str) -> int:
+    try:
+        parsed = datetime.fromisoformat(raw_since_date)
+    except ValueError as exc:
+        raise SystemExit(
+            "Invalid since_date. Use YYYY-MM-DD or an ISO-8601 datetime like 2024-01-01T00:00:00Z."
+        ) from exc
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    now = datetime.now(UTC)
+    if parsed > now:
+        raise SystemExit("since_date must be in the past.")
+    # Ceiling division on timedeltas stays in exact integer arithmetic.
+    return max(1, -((parsed - now) // timedelta(days=1)))
+
+
+def _validate_pr_range(from_pr: int | None, to_pr: int | None) -> None:
+    if (from_pr is None) ^ (to_pr is None):
+        raise SystemExit("--from-pr and --to-pr must be provided together.")
+    if from_pr is not None and to_pr is not None:
+        if from_pr <= 0 or to_pr <= 0:
+            raise SystemExit("--from-pr and --to-pr must be positive integers.")
+        if from_pr > to_pr:
+            raise SystemExit("--from-pr must be <= --to-pr.")
+
+
 def _apply_cli_overrides(cfg: AppConfig, args: argparse.Namespace) -> AppConfig:
     model_name = args.model or cfg.model.name
     # Model provider/reasoning live in config; --model is the only per-run override requested.
@@ -121,6 +210,20 @@ def _apply_cli_overrides(cfg: AppConfig, args: argparse.Namespace) -> AppConfig:
     since_date_override = getattr(args, "since_date", None)
     from_pr_override = getattr(args, "from_pr", None)
     to_pr_override = getattr(args, "to_pr", None)
+    max_commits = getattr(args, "max_commits", None)
+    max_patch_lines = getattr(args, "max_patch_lines", None)
+    overrides = (
+        since_days_override,
+        since_date_override,
+        from_pr_override,
+        to_pr_override,
+        max_commits,
+        max_patch_lines,
+    )
+    if not args.model and cfg.extract.since_date is None and all(v is None for v in overrides):
+        # Nothing to resolve or override: keep the loaded config as-is.
+        _validate_pr_range(cfg.extract.from_pr, cfg.extract.to_pr)
+        return cfg
     if since_date_override is not None:
         raw_since_date = since_date_override
         since_days_override = None
@@ -129,20 +232,7 @@ def _apply_cli_overrides(cfg: AppConfig, args: argparse.Namespace) -> AppConfig:
     else:
         raw_since_date = None
     if since_days_override is None and raw_since_date is not None:
-        try:
-            parsed = datetime.fromisoformat(raw_since_date)
-        except ValueError as exc:
-            raise SystemExit(
-                "Invalid since_date. Use YYYY-MM-DD or an ISO-8601 datetime like "
-                "2024-01-01T00:00:00Z."
-            ) from exc
-        if parsed.tzinfo is None:
-            parsed = parsed.replace(tzinfo=UTC)
-        now = datetime.now(UTC)
-        if parsed > now:
-            raise SystemExit("since_date must be in the past.")
-        delta_seconds = (now - parsed).total_seconds()
-        since_days = max(1, math.ceil(delta_seconds / 86400))
+        since_days = _since_days_from_date(raw_since_date)
         effective_since_date = raw_since_date
     else:
         since_days = (
@@ -151,37 +241,19 @@ def _apply_cli_overrides(cfg: AppConfig, args: argparse.Namespace) -> AppConfig:
         effective_since_date = None
     from_pr = cfg.extract.from_pr if from_pr_override is None else from_pr_override
     to_pr = cfg.extract.to_pr if to_pr_override is None else to_pr_override
-    if (from_pr is None) ^ (to_pr is None):
-        raise SystemExit("--from-pr and --to-pr must be provided together.")
-    if from_pr is not None and to_pr is not None:
-        if from_pr <= 0 or to_pr <= 0:
-            raise SystemExit("--from-pr and --to-pr must be positive integers.")
-        if from_pr > to_pr:
-            raise SystemExit("--from-pr must be <= --to-pr.")
-    max_commits = getattr(args, "max_commits", None)
-    max_patch_lines = getattr(args, "max_patch_lines", None)
-    return AppConfig(
-        model=cfg.model.__class__(
-            name=model_name,
-            provider=cfg.model.provider,
-            reasoning_effort=cfg.model.reasoning_effort,
-            temperature=cfg.model.temperature,
-        ),
-        extract=cfg.extract.__class__(
-            since_date=effective_since_date,
-            since_days=since_days if since_days is not None else cfg.extract.since_days,
-            max_commits=max_commits if max_commits is not None else cfg.extract.max_commits,
-            max_patch_lines=max_patch_lines
-            if max_patch_lines is not None
-            else cfg.extract.max_patch_lines,
-            include_github=cfg.extract.include_github,
-            max_issues=cfg.extract.max_issues,
-            max_prs=cfg.extract.max_prs,
-            from_pr=from_pr,
-            to_pr=to_pr,
-        ),
-        reports=cfg.reports,
-    )
+    _validate_pr_range(from_pr, to_pr)
+    extract_overrides: dict[str, Any] = {
+        "since_date": effective_since_date,
+        "since_days": since_days,
+        "from_pr": from_pr,
+        "to_pr": to_pr,
+    }
+    if max_commits is not None:
+        extract_overrides["max_commits"] = max_commits
+    if max_patch_lines is not None:
+        extract_overrides["max_patch_lines"] = max_patch_lines
+    model = cfg.model if model_name == cfg.model.name else replace(cfg.model, name=model_name)
+    return replace(cfg, model=model, extract=replace(cfg.extract, **extract_overrides))
 
 
 def _configure_logging() -> None:
@@ -247,6 +319,9 @@ def _sum_cost_from_results(results: list[dict[str, Any]]) -> float | None:
     for result in results:
         for message in result.get("messages") or []:
             meta = getattr(message, "response_metadata", None)
+            if not meta:
+                # Human and tool messages carry empty metadata; skip the cost-key probing.
+                continue
             total_cost, hit = _accumulate_cost(meta, total_cost)
             found = found or hit
     return total_cost if found else None
@@ -269,13 +344,8 @@ def _log_run_usage(usage_by_model: dict[str, Any], results: list[dict[str, Any]]
     )
 
 
-def main() -> int:
-    _configure_logging()
-    logger.info("Starting different-agent.")
-    load_dotenv()
-    reset_analyzed_commit_count()
-    reset_analyzed_pr_count()
-
+@functools.cache
+def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="different-agent")
     parser.add_argument(
         "--config",
@@ -336,10 +406,42 @@ def main() -> int:
         default="outputs/target_assessment.json",
         help="Base output path for target assessment JSON (suffix + project folder are added)",
     )
+    parser.add_argument(
+        "--no-usage",
+        action="store_true",
+        help="Skip token usage tracking and the end-of-run cost/usage log",
+    )
+    return parser
+
 
+def main() -> int:
+    _configure_logging()
+    logger.info("Starting different-agent.")
+
+    parser = _build_parser()
     args = parser.parse_args()
     if not args.extract_only and not args.target:
         parser.error("--target is required unless --extract-only is set")
+
+    # The LLM stack takes hundreds of milliseconds to import; defer it until the arguments
+    # are known to be valid so --help and usage errors return immediately.
+    from dotenv import load_dotenv
+    from langchain_core.callbacks import get_usage_metadata_callback
+    from langgraph.cache.memory import InMemoryCache
+
+    from different_agent.agents import (
+        assess_findings_parallel,
+        create_inspiration_agent,
+        create_target_agent,
+    )
+    from different_agent.git_tools import get_analyzed_commit_count, reset_analyzed_commit_count
+    from different_agent.github_tools import get_analyzed_pr_count, reset_analyzed_pr_count
+    from different_agent.model import create_chat_model
+    from different_agent.report import render_findings_html, render_target_assessment_html
+
+    load_dotenv()
+    reset_analyzed_commit_count()
+    reset_analyzed_pr_count()
     if args.extract_only:
         logger.info("Extract-only enabled: skipping target analysis.")
     cfg_path = _default_config_path(args.config)
@@ -396,8 +498,9 @@ def main() -> int:
     output_project_name = _output_project_name(inspiration_path, target_path)
 
     extract_result: dict[str, Any] = {}
-    target_result: dict[str, Any] = {}
-    with get_usage_metadata_callback() as usage_cb:
+    target_results: list[Any] = []
+    usage_cm = nullcontext() if args.no_usage else get_usage_metadata_callback()
+    with usage_cm as usage_cb:
         extract_agent = create_inspiration_agent(
             resolved.model,
             cache=cache,
@@ -421,81 +524,65 @@ def main() -> int:
             {"messages": [{"role": "user", "content": extract_prompt}]}
         )
         logger.info("Inspiration agent finished.")
-        structured_findings = _structured_response_to_list(
+        findings: Any = _structured_response_to_list(
             extract_result.get("structured_response"), "findings"
         )
-        if structured_findings is not None:
-            findings_json = json.dumps(structured_findings)
+        if findings is not None:
             logger.info("Using structured response for findings.")
         else:
             findings_json = _extract_state_file(extract_result, "/outputs/findings.json")
             if findings_json is None:
                 raise SystemExit("Agent did not write /outputs/findings.json")
+            findings = json.loads(findings_json)
         findings_out_path = _apply_output_naming(
             Path(args.findings_out), output_project_name, output_suffix
         )
-        _write_output_json(findings_out_path, findings_json)
-        logger.info("Wrote findings JSON to %s.", findings_out_path)
-        if cfg.reports.html:
-            findings = json.loads(findings_json)
-            if isinstance(findings, list):
-                html_path = findings_out_path.with_suffix(".html")
-                _write_output_html(html_path, render_findings_html(findings))
-                logger.info("Wrote findings HTML report to %s.", html_path)
-
-        if not args.extract_only:
-            # Provide the findings JSON to the target agent as an in-memory file.
-            # DeepAgents' StateBackend expects FileData objects (content as list of lines).
-            initial_files = {
-                "/inputs/findings.json": {
-                    "content": findings_json.splitlines(),
-                    "created_at": "1970-01-01T00:00:00Z",
-                    "modified_at": "1970-01-01T00:00:00Z",
-                }
-            }
-
-            target_agent = create_target_agent(resolved.model, cache=cache)
-            target_prompt = (
-                "Check this target repository for applicability of the findings in "
-                "/inputs/findings.json.\n\n"
-                f"target_repo_path: {cast(str, target_path)}\n"
-            )
-            logger.info("Invoking target agent.")
-            target_result = target_agent.invoke(
-                {
-                    "messages": [{"role": "user", "content": target_prompt}],
-                    "files": initial_files,
-                }
+        with ThreadPoolExecutor(max_workers=1) as report_pool:
+            # Findings are persisted in the background while the target stage runs.
+            findings_written = report_pool.submit(
+                _write_findings_outputs,
+                findings_out_path,
+                findings,
+                render_findings_html if cfg.reports.html else None,
             )
-            logger.info("Target agent finished.")
-            structured_assessments = _structured_response_to_list(
-                target_result.get("structured_response"), "assessments"
-            )
-            if structured_assessments is not None:
-                assessment_json = json.dumps(structured_assessments)
-                logger.info("Using structured response for target assessment.")
-            else:
-                assessment_json = _extract_state_file(
-                    target_result, "/outputs/target_assessment.json"
-                )
-                if assessment_json is None:
-                    raise SystemExit("Agent did not write /outputs/target_assessment.json")
-            assessment_out_path = _apply_output_naming(
-                Path(args.assessment_out), output_project_name, output_suffix
-            )
-            _write_output_json(assessment_out_path, assessment_json)
-            logger.info("Wrote target assessment JSON to %s.", assessment_out_path)
-            if cfg.reports.html:
-                assessments = json.loads(assessment_json)
-                if isinstance(assessments, list):
-                    html_path = assessment_out_path.with_suffix(".html")
-                    _write_output_html(html_path, render_target_assessment_html(assessments))
-                    logger.info("Wrote target assessment HTML report to %s.", html_path)
-
-    results = [extract_result]
-    if not args.extract_only:
-        results.append(target_result)
-    _log_run_usage(usage_cb.usage_metadata, results)
+
+            try:
+                if not args.extract_only:
+                    findings_for_target = findings if isinstance(findings, list) else [findings]
+                    target_agent = create_target_agent(resolved.model, cache=cache)
+                    logger.info(
+                        "Invoking target agent for %s findings (max_concurrency=%s).",
+                        len(findings_for_target),
+                        _TARGET_MAX_CONCURRENCY,
+                    )
+                    target_results = asyncio.run(
+                        assess_findings_parallel(
+                            target_agent,
+                            cast(str, target_path),
+                            findings_for_target,
+                            max_concurrency=_TARGET_MAX_CONCURRENCY,
+                        )
+                    )
+                    logger.info("Target agent finished.")
+                    assessments_list = _collect_assessments(findings_for_target, target_results)
+                    assessment_out_path = _apply_output_naming(
+                        Path(args.assessment_out), output_project_name, output_suffix
+                    )
+                    _write_output_json(assessment_out_path, assessments_list)
+                    logger.info("Wrote target assessment JSON to %s.", assessment_out_path)
+                    if cfg.reports.html:
+                        html_path = assessment_out_path.with_suffix(".html")
+                        _write_output_html(
+                            html_path, render_target_assessment_html(assessments_list)
+                        )
+                        logger.info("Wrote target assessment HTML report to %s.", html_path)
+            finally:
+                # Surface write errors even when the target stage fails.
+                findings_written.result()
+
+    if usage_cb is not None:
+        results = [extract_result, *(r for r in target_results if isinstance(r, dict))]
+        _log_run_usage(usage_cb.usage_metadata, results)
     logger.info(
         "Analyzed commits: %s. Analyzed PRs: %s.",
         get_analyzed_commit_count(),
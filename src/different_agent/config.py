@@ -1,43 +1,72 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, TypeVar
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
+class _FieldCheck:
+    """Accepted TOML types for a config field, with the wording used in errors."""
+
+    types: tuple[type, ...]
+    expected: str
+    to_float: bool = False
+
+
+# bool is an int subclass, so int/float fields accept it as they always have.
+_STR = _FieldCheck((str,), "a string")
+_STR_OR_NONE = _FieldCheck((str, type(None)), "a string or null")
+_BOOL = _FieldCheck((bool,), "a bool")
+_INT = _FieldCheck((int,), "an int")
+_INT_OR_NONE = _FieldCheck((int, type(None)), "an int or null")
+_FLOAT = _FieldCheck((int, float), "a float", to_float=True)
+
+
+def _setting(default: Any, check: _FieldCheck) -> Any:
+    return field(default=default, metadata={"check": check})
+
+
+@dataclass(frozen=True, slots=True)
 class ModelConfig:
-    name: str = "gpt-5.2"
-    provider: str = "openai"
-    reasoning_effort: str | None = "xhigh"
-    temperature: float = 0.0
+    name: str = _setting("gpt-5.2", _STR)
+    provider: str = _setting("openai", _STR)
+    reasoning_effort: str | None = _setting("xhigh", _STR_OR_NONE)
+    temperature: float = _setting(0.0, _FLOAT)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ExtractConfig:
-    since_date: str | None = None
-    since_days: int = 30
-    max_commits: int = 50
-    max_patch_lines: int = 400
-    include_github: bool = True
-    max_issues: int = 50
-    max_prs: int = 50
-    from_pr: int | None = None
-    to_pr: int | None = None
-
-
-@dataclass(frozen=True)
+    since_date: str | None = _setting(None, _STR_OR_NONE)
+    since_days: int = _setting(30, _INT)
+    max_commits: int = _setting(50, _INT)
+    max_patch_lines: int = _setting(400, _INT)
+    include_github: bool = _setting(True, _BOOL)
+    max_issues: int = _setting(50, _INT)
+    max_prs: int = _setting(50, _INT)
+    from_pr: int | None = _setting(None, _INT_OR_NONE)
+    to_pr: int | None = _setting(None, _INT_OR_NONE)
+
+
+@dataclass(frozen=True, slots=True)
 class ReportsConfig:
-    html: bool = True
+    html: bool = _setting(True, _BOOL)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AppConfig:
     model: ModelConfig = ModelConfig()
     extract: ExtractConfig = ExtractConfig()
     reports: ReportsConfig = ReportsConfig()
 
 
+_SectionT = TypeVar("_SectionT", ModelConfig, ExtractConfig, ReportsConfig)
+
+# Slotted classes expose fields as descriptors, so defaults are read from an instance.
+_DEFAULTS = AppConfig()
+
+
 def _get_table(cfg: dict[str, Any], key: str) -> dict[str, Any]:
     value = cfg.get(key, {})
     if value is None:
@@ -47,92 +76,43 @@ def _get_table(cfg: dict[str, Any], key: str) -> dict[str, Any]:
     return value
 
 
-def _get_str(table: dict[str, Any], key: str, default: str) -> str:
-    value = table.get(key, default)
-    if not isinstance(value, str):
-        raise ValueError(f"Config value must be a string: {key}")
-    return value
-
-
-def _get_optional_str(table: dict[str, Any], key: str, default: str | None) -> str | None:
-    value = table.get(key, default)
-    if value is None:
-        return None
-    if not isinstance(value, str):
-        raise ValueError(f"Config value must be a string or null: {key}")
-    return value
-
-
-def _get_bool(table: dict[str, Any], key: str, default: bool) -> bool:
-    value = table.get(key, default)
-    if not isinstance(value, bool):
-        raise ValueError(f"Config value must be a bool: {key}")
-    return value
-
-
-def _get_int(table: dict[str, Any], key: str, default: int) -> int:
-    value = table.get(key, default)
-    if not isinstance(value, int):
-        raise ValueError(f"Config value must be an int: {key}")
-    return value
-
-
-def _get_optional_int(table: dict[str, Any], key: str, default: int | None) -> int | None:
-    value = table.get(key, default)
-    if value is None:
-        return None
-    if not isinstance(value, int):
-        raise ValueError(f"Config value must be an int or null: {key}")
-    return value
-
-
-def _get_float(table: dict[str, Any], key: str, default: float) -> float:
-    value = table.get(key, default)
-    if isinstance(value, int):
-        return float(value)
-    if not isinstance(value, float):
-        raise ValueError(f"Config value must be a float: {key}")
-    return value
+def _read_section(raw: dict[str, Any], section: str, cls: type[_SectionT]) -> _SectionT:
+    table = _get_table(raw, section)
+    defaults = getattr(_DEFAULTS, section)
+    values: dict[str, Any] = {}
+    for f in fields(cls):
+        value = table.get(f.name, getattr(defaults, f.name))
+        check: _FieldCheck = f.metadata["check"]
+        if not isinstance(value, check.types):
+            raise ValueError(f"Config value must be {check.expected}: {section}.{f.name}")
+        values[f.name] = float(value) if check.to_float else value
+    return cls(**values)
 
 
 def load_config(path: Path) -> AppConfig:
     """Load config from TOML, or return defaults if file doesn't exist."""
-    if not path.exists():
-        return AppConfig()
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return _DEFAULTS
+    # Configs are frozen, so a parse can be shared until the file changes. The resolved path
+    # keeps same-named configs in different directories apart after a cwd change.
+    return _load_config_cached(str(path.resolve()), st.st_mtime_ns, st.st_size)
+
 
+@lru_cache(maxsize=16)
+def _load_config_cached(path_str: str, _mtime_ns: int, _size: int) -> AppConfig:
     import tomllib
 
-    raw = tomllib.loads(path.read_text(encoding="utf-8"))
+    path = Path(path_str)
+
+    with path.open("rb") as f:
+        raw = tomllib.load(f)
     if not isinstance(raw, dict):
         raise ValueError("Config file must parse to a TOML object")
 
-    model_raw = _get_table(raw, "model")
-    extract_raw = _get_table(raw, "extract")
-    reports_raw = _get_table(raw, "reports")
-
-    model = ModelConfig(
-        name=_get_str(model_raw, "name", ModelConfig.name),
-        provider=_get_str(model_raw, "provider", ModelConfig.provider),
-        reasoning_effort=model_raw.get("reasoning_effort", ModelConfig.reasoning_effort),
-        temperature=_get_float(model_raw, "temperature", ModelConfig.temperature),
+    return AppConfig(
+        model=_read_section(raw, "model", ModelConfig),
+        extract=_read_section(raw, "extract", ExtractConfig),
+        reports=_read_section(raw, "reports", ReportsConfig),
     )
-    if model.reasoning_effort is not None and not isinstance(model.reasoning_effort, str):
-        raise ValueError("Config value must be a string or null: model.reasoning_effort")
-
-    extract = ExtractConfig(
-        since_date=_get_optional_str(extract_raw, "since_date", ExtractConfig.since_date),
-        since_days=_get_int(extract_raw, "since_days", ExtractConfig.since_days),
-        max_commits=_get_int(extract_raw, "max_commits", ExtractConfig.max_commits),
-        max_patch_lines=_get_int(extract_raw, "max_patch_lines", ExtractConfig.max_patch_lines),
-        include_github=_get_bool(extract_raw, "include_github", ExtractConfig.include_github),
-        max_issues=_get_int(extract_raw, "max_issues", ExtractConfig.max_issues),
-        max_prs=_get_int(extract_raw, "max_prs", ExtractConfig.max_prs),
-        from_pr=_get_optional_int(extract_raw, "from_pr", ExtractConfig.from_pr),
-        to_pr=_get_optional_int(extract_raw, "to_pr", ExtractConfig.to_pr),
-    )
-
-    reports = ReportsConfig(
-        html=_get_bool(reports_raw, "html", ReportsConfig.html),
-    )
-
-    return AppConfig(model=model, extract=extract, reports=reports)
@@ -1,37 +1,97 @@
 from __future__ import annotations
 
+import functools
+import importlib
 import logging
 import os
+import re
 import shutil
 import subprocess
-from dataclasses import dataclass
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, cast
 
 from langchain_core.tools import tool
 
+from different_agent.tool_cache import cached_tool
+
 logger = logging.getLogger(__name__)
 
 
-_ANALYZED_COMMITS: set[str] = set()
+@dataclass
+class _CommitTally:
+    # The count is what callers need; dedup only has to cover recently seen SHAs, so memory
+    # stays bounded however long the process runs.
+    count: int = 0
+    recent: OrderedDict[str, None] = field(default_factory=OrderedDict)
+
+
+_ANALYZED_RECENT_MAX = 1024
+_ANALYZED_COMMITS = _CommitTally()
+# Tools may run on executor threads during the parallel target stage.
+_ANALYZED_LOCK = threading.Lock()
 
 
 def _record_analyzed_commit(sha: str | None) -> None:
-    if sha:
-        _ANALYZED_COMMITS.add(sha)
+    if not sha:
+        return
+    with _ANALYZED_LOCK:
+        recent = _ANALYZED_COMMITS.recent
+        if sha in recent:
+            return
+        _ANALYZED_COMMITS.count += 1
+        recent[sha] = None
+        if len(recent) > _ANALYZED_RECENT_MAX:
+            recent.popitem(last=False)
 
 
 def get_analyzed_commit_count() -> int:
-    return len(_ANALYZED_COMMITS)
+    return _ANALYZED_COMMITS.count
 
 
 def reset_analyzed_commit_count() -> None:
-    _ANALYZED_COMMITS.clear()
-
-
-@dataclass(frozen=True)
-class GitCommandResult:
-    stdout: str
+    with _ANALYZED_LOCK:
+        _ANALYZED_COMMITS.count = 0
+        _ANALYZED_COMMITS.recent.clear()
 
 
+def _load_pygit2() -> Any | None:
+    # Optional accelerator: libgit2 bindings walk history in-process instead of forking git.
+    try:
+        return importlib.import_module("pygit2")
+    except ImportError:
+        return None
+
+
+_PYGIT2 = _load_pygit2()
+
+_LIKELY_FIX_KEYWORDS = (
+    "fix",
+    "security",
+    "vuln",
+    "cve",
+    "sanitize",
+    "overflow",
+    "race",
+    "dos",
+    "leak",
+)
+_LIKELY_FIX_PATTERN = "|".join(_LIKELY_FIX_KEYWORDS)
+
+# Paths that never carry a code fix on their own: docs, tests, and CI configuration.
+_NON_CODE_PATH_RE = re.compile(
+    r"(?:^|[/\t])(?:docs?/|tests?/|\.github/|test_[^/]*$)|\.(?:md|rst)$|_test\.py$",
+    re.IGNORECASE,
+)
+
+
+# Every tool call checks its repo; successes are memoized (exceptions never are), and a repo
+# that disappears later still surfaces as a failed git command.
+@functools.lru_cache(maxsize=32)
 def _ensure_git_repo(repo_path: str) -> None:
     git_dir = os.path.join(repo_path, ".git")
     if not os.path.isdir(git_dir):
@@ -39,7 +99,23 @@ def _ensure_git_repo(repo_path: str) -> None:
         raise ValueError(msg)
 
 
-def _run_git(repo_path: str, args: list[str]) -> GitCommandResult:
+def _truncate_lines(text: str, max_lines: int, marker: str) -> tuple[str, bool]:
+    """Keep the first `max_lines` lines of `text`, appending `marker` if anything was cut.
+
+    Slices the original string instead of splitting it, so large outputs aren't copied
+    line by line just to keep a short prefix.
+    """
+    end = -1
+    for _ in range(max_lines):
+        end = text.find("\n", end + 1)
+        if end == -1:
+            return text, False
+    if end + 1 == len(text):
+        return text, False
+    return text[:end] + marker, True
+
+
+def _run_git(repo_path: str, args: list[str], stdin: str | None = None) -> str:
     _ensure_git_repo(repo_path)
     cmd = ["git", "-C", repo_path, *args]
     logger.debug("Running git command in %s: %s.", repo_path, args)
@@ -48,41 +124,190 @@ def _run_git(repo_path: str, args: list[str]) -> GitCommandResult:
         check=True,
         text=True,
         capture_output=True,
+        input=stdin,
     )
-    return GitCommandResult(stdout=completed.stdout)
+    return completed.stdout
+
+
+def _stream_lines(
+    cmd: list[str],
+    max_lines: int,
+    count_from: str | None = None,
+    header_end: str | None = None,
+) -> tuple[list[str], bool]:
+    """Read up to `max_lines` stdout lines from `cmd`, killing it once more output arrives.
+
+    With `count_from`, lines before the first one starting with that prefix are kept but
+    don't count toward the cap; with `header_end` too, the prefix is only looked for after
+    the first line containing `header_end`. Returns the lines (with line endings) and whether output
+    was cut short. Raises CalledProcessError when the command exits non-zero before
+    reaching the cap.
+    """
+    lines: list[str] = []
+    counted = 0
+    counting = count_from is None
+    in_header = header_end is not None
+    truncated = False
+    # stderr goes to a file rather than a pipe: a chatty command could otherwise fill the
+    # unread stderr pipe and block while we wait on stdout.
+    with (
+        tempfile.TemporaryFile() as stderr_file,
+        subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=stderr_file,
+            text=True,
+        ) as proc,
+    ):
+        for line in proc.stdout or ():
+            if in_header:
+                in_header = cast(str, header_end) not in line
+            elif not counting and line.startswith(cast(str, count_from)):
+                counting = True
+            if counting:
+                if counted == max_lines:
+                    truncated = True
+                    break
+                counted += 1
+            lines.append(line)
+        if truncated:
+            # Stop git from producing output we'd only discard.
+            proc.kill()
+            proc.wait()
+            return lines, True
+        returncode = proc.wait()
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode(errors="replace")
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, "".join(lines), stderr)
+    return lines, False
+
+
+def _join_stream(lines: list[str], truncated: bool, marker: str) -> str:
+    # Same shape as _truncate_lines: the cut drops the last kept line's newline.
+    text = "".join(lines)
+    return text.removesuffix("\n") + marker if truncated else text
+
+
+def _run_git_stream(
+    repo_path: str, args: list[str], max_lines: int, marker: str
+) -> tuple[str, bool]:
+    """Like `_run_git`, but read at most `max_lines` lines and append `marker` if cut."""
+    _ensure_git_repo(repo_path)
+    logger.debug("Streaming git command in %s: %s.", repo_path, args)
+    lines, truncated = _stream_lines(["git", "-C", repo_path, *args], max_lines)
+    return _join_stream(lines, truncated, marker), truncated
+
+
+def _pygit2_repo(repo_path: str) -> tuple[Any, Any] | None:
+    """Return (pygit2 module, repository) for `repo_path`; None when pygit2 can't serve it."""
+    pygit2 = _PYGIT2
+    if pygit2 is None:
+        return None
+    repo = _open_pygit2_repo(pygit2, repo_path)
+    return None if repo is None else (pygit2, repo)
+
+
+@functools.lru_cache(maxsize=8)
+def _open_pygit2_repo(pygit2: Any, repo_path: str) -> Any | None:
+    try:
+        return pygit2.Repository(repo_path)
+    except (pygit2.GitError, KeyError, ValueError):
+        return None
+
+
+_OBJECT_ID_RE = re.compile(r"[0-9a-f]{40}(?:[0-9a-f]{24})?")
+
+
+def _is_object_id(value: str) -> bool:
+    # Only full SHA-1/SHA-256 ids are stable cache keys; HEAD, branches and short SHAs can move.
+    return _OBJECT_ID_RE.fullmatch(value) is not None
+
+
+def _since_epoch(since_days: int) -> int:
+    # An absolute cutoff skips git's approxidate parsing and matches the pygit2 walk exactly.
+    return int(time.time()) - since_days * 86400
+
+
+def _recent_commits_pygit2(repo_path: str, since_days: int, max_count: int) -> list[dict] | None:
+    """Mirror `git_recent_commits`' `git log` output via pygit2; None means use git instead."""
+    opened = _pygit2_repo(repo_path)
+    if opened is None:
+        return None
+    pygit2, repo = opened
+    try:
+        walker = repo.walk(repo.head.target, pygit2.GIT_SORT_TIME)
+    except (pygit2.GitError, KeyError, ValueError):
+        return None
+    cutoff = _since_epoch(since_days)
+    commits: list[dict] = []
+    for commit in walker:
+        if commit.commit_time < cutoff:
+            break
+        author = commit.author
+        tz = timezone(timedelta(minutes=author.offset))
+        # %s: the first paragraph of the message, folded onto one line.
+        subject = " ".join(commit.message.strip().split("\n\n", 1)[0].split("\n"))
+        commits.append(
+            {
+                "sha": str(commit.id),
+                "author": author.name,
+                "date": datetime.fromtimestamp(author.time, tz).isoformat(),
+                "subject": subject,
+            }
+        )
+        if len(commits) >= max_count:
+            break
+    return commits
 
 
 @tool
-def git_recent_commits(repo_path: str, since_days: int = 30, max_count: int = 50) -> list[dict]:
-    """Return recent commits for a repository (metadata only, no diffs)."""
+def git_recent_commits(
+    repo_path: str, since_days: int = 30, max_count: int = 50, filter_likely_fixes: bool = False
+) -> list[dict]:
+    """Return recent commits for a repository (metadata only, no diffs).
+
+    With filter_likely_fixes=True, only commits whose message mentions a fix-related keyword
+    (fix, security, vuln, cve, ...) are returned.
+    """
     logger.info(
-        "Reading recent commits from %s (since_days=%s, max_count=%s).",
+        "Reading recent commits from %s (since_days=%s, max_count=%s, filter_likely_fixes=%s).",
         repo_path,
         since_days,
         max_count,
+        filter_likely_fixes,
     )
     if since_days <= 0:
         raise ValueError("since_days must be > 0")
     if max_count <= 0:
         raise ValueError("max_count must be > 0")
 
-    # Use record/field separators that won't appear in normal text.
+    _ensure_git_repo(repo_path)
+    if not filter_likely_fixes:
+        fast = _recent_commits_pygit2(repo_path, since_days, max_count)
+        if fast is not None:
+            logger.info("Found %s recent commits.", len(fast))
+            return fast
+
+    # Fields are split on \x1f and -z ends each record with NUL, so records need no trimming.
     # Each record: sha, author_name, author_date, subject
-    fmt = "%H%x1f%an%x1f%ad%x1f%s%x1e"
-    out = _run_git(
-        repo_path,
-        [
-            "log",
-            f"--since={since_days} days ago",
-            f"--max-count={max_count}",
-            "--date=iso-strict",
-            f"--pretty=format:{fmt}",
-        ],
-    ).stdout
+    fmt = "%H%x1f%an%x1f%ad%x1f%s"
+    args = [
+        "log",
+        "-z",
+        f"--since={_since_epoch(since_days)}",
+        f"--max-count={max_count}",
+        "--date=iso-strict",
+        f"--format={fmt}",
+    ]
+    if filter_likely_fixes:
+        # Let git match the keywords in one pass so --max-count applies to matching commits.
+        args += ["--regexp-ignore-case", "--extended-regexp", f"--grep={_LIKELY_FIX_PATTERN}"]
+    out = _run_git(repo_path, args)
 
     commits: list[dict] = []
-    for record in out.split("\x1e"):
-        record = record.strip()
+    for record in out.split("\0"):
         if not record:
             continue
         sha, author, date, subject = record.split("\x1f")
@@ -98,9 +323,21 @@ def git_recent_commits(repo_path: str, since_days: int = 30, max_count: int = 50
     return commits
 
 
+# sha, author, date, subject, body; \x1d ends the header ahead of the --raw/--patch output.
+_COMMIT_RECORD_FORMAT = "%H%x1f%an%x1f%ad%x1f%s%x1f%b%x1d"
+
+
 @tool
 def git_show_commit(repo_path: str, sha: str, max_patch_lines: int = 400) -> dict:
     """Return commit metadata + file list + a truncated patch."""
+    commit = _show_commit(repo_path, sha, max_patch_lines)
+    # Recorded outside the cache so repeated lookups still count toward this run's tally.
+    _record_analyzed_commit(commit["sha"])
+    return commit
+
+
+@cached_tool(cache_if=lambda arguments: _is_object_id(arguments["sha"]))
+def _show_commit(repo_path: str, sha: str, max_patch_lines: int) -> dict:
     logger.info(
         "Loading commit %s from %s (max_patch_lines=%s).",
         sha,
@@ -110,57 +347,62 @@ def git_show_commit(repo_path: str, sha: str, max_patch_lines: int = 400) -> dic
     if max_patch_lines <= 0:
         raise ValueError("max_patch_lines must be > 0")
 
-    meta_fmt = "%H%x1f%an%x1f%ad%x1f%s%x1f%b"
-    meta = _run_git(
-        repo_path,
-        [
-            "show",
-            "--no-color",
-            "--date=iso-strict",
-            f"--pretty=format:{meta_fmt}",
-            "--name-status",
-            "--no-patch",
-            sha,
-        ],
-    ).stdout
-
-    # Split header and name-status list
-    meta_line, *file_lines = meta.splitlines()
-    commit_sha, author, date, subject, body = meta_line.split("\x1f")
-    files_changed: list[dict] = []
-    for line in file_lines:
-        line = line.strip()
-        if not line:
-            continue
-        # name-status: <status>\t<path>
-        parts = line.split("\t", 1)
-        if len(parts) != 2:
-            continue
-        status, path = parts
-        files_changed.append({"status": status, "path": path})
-
-    patch = _run_git(
+    # One git call yields metadata, the --raw file list and the patch; only patch lines count
+    # toward the cap, and git is stopped once it is reached.
+    _ensure_git_repo(repo_path)
+    cmd = [
+        "git",
+        "-C",
         repo_path,
-        [
-            "show",
-            "--no-color",
-            "--format=",
-            "--patch",
-            sha,
-        ],
-    ).stdout
-    patch_lines = patch.splitlines()
-    truncated = False
-    if len(patch_lines) > max_patch_lines:
-        patch = "\n".join(patch_lines[:max_patch_lines]) + "\n\n[patch truncated]"
-        truncated = True
+        "show",
+        "--no-color",
+        "--date=iso-strict",
+        f"--format={_COMMIT_RECORD_FORMAT}",
+        "--raw",
+        "--patch",
+        sha,
+    ]
+    # Start counting at the patch, not at a "diff " line quoted in the commit message.
+    lines, cut = _stream_lines(cmd, max_patch_lines, count_from="diff ", header_end="\x1d")
+    commit = _parse_bulk_commit_record("".join(lines), max_patch_lines)
+    if cut and not commit["patch_truncated"]:
+        commit["patch"] = _join_stream([commit["patch"]], True, "\n\n[patch truncated]")
+        commit["patch_truncated"] = True
 
     logger.info(
         "Loaded commit metadata. Files changed: %s. Patch truncated: %s.",
-        len(files_changed),
-        truncated,
+        len(commit["files"]),
+        commit["patch_truncated"],
     )
-    _record_analyzed_commit(commit_sha)
+    return commit
+
+
+def _parse_raw_status(line: str) -> dict | None:
+    # --raw: ":<old_mode> <new_mode> <old_sha> <new_sha> <status>\t<path>[\t<path>]"
+    meta, sep, path = line.partition("\t")
+    if not sep:
+        return None
+    return {"status": meta.rsplit(" ", 1)[-1], "path": path}
+
+
+def _parse_bulk_commit_record(record: str, max_patch_lines: int) -> dict:
+    header, _, rest = record.partition("\x1d")
+    commit_sha, author, date, subject, body = header.split("\x1f")
+    # --raw status lines come first; the patch starts at the first "diff " line.
+    marker = rest.find("\ndiff ")
+    if rest.startswith("diff "):
+        raw, patch = "", rest
+    elif marker == -1:
+        raw, patch = rest, ""
+    else:
+        raw, patch = rest[:marker], rest[marker + 1 :]
+    files_changed: list[dict] = []
+    for line in raw.splitlines():
+        if line.startswith(":"):
+            entry = _parse_raw_status(line)
+            if entry is not None:
+                files_changed.append(entry)
+    patch, truncated = _truncate_lines(patch, max_patch_lines, "\n\n[patch truncated]")
     return {
         "sha": commit_sha,
         "author": author,
@@ -170,10 +412,78 @@ def git_show_commit(repo_path: str, sha: str, max_patch_lines: int = 400) -> dic
         "files": files_changed,
         "patch": patch,
         "patch_truncated": truncated,
+        "non_code_only": bool(files_changed)
+        and all(_NON_CODE_PATH_RE.search(f["path"]) for f in files_changed),
     }
 
 
 @tool
+def git_show_commits_bulk(
+    repo_path: str, shas: list[str], max_patch_lines: int = 400
+) -> list[dict]:
+    """Return metadata + file list + a truncated patch for several commits in one git call."""
+    logger.info(
+        "Loading %s commits from %s (max_patch_lines=%s).",
+        len(shas),
+        repo_path,
+        max_patch_lines,
+    )
+    if max_patch_lines <= 0:
+        raise ValueError("max_patch_lines must be > 0")
+    if not shas:
+        return []
+
+    # Revisions go through stdin so agent-supplied values are never parsed as options.
+    fmt = f"%x1e{_COMMIT_RECORD_FORMAT}"
+    try:
+        out = _run_git(
+            repo_path,
+            [
+                "log",
+                "--no-walk=unsorted",
+                "--stdin",
+                "--no-color",
+                "--date=iso-strict",
+                f"--format={fmt}",
+                "--raw",
+                "--patch",
+            ],
+            stdin="\n".join(shas) + "\n",
+        )
+    except subprocess.CalledProcessError as e:
+        error = (e.stderr or "").strip() or "git log failed"
+        logger.warning("Failed to load commits from %s: %s.", repo_path, error)
+        return [{"error": error}]
+
+    commits: list[dict] = []
+    for record in out.split("\x1e"):
+        if not record:
+            continue
+        commit = _parse_bulk_commit_record(record, max_patch_lines)
+        _record_analyzed_commit(commit["sha"])
+        commits.append(commit)
+    logger.info("Loaded %s commits.", len(commits))
+    return commits
+
+
+def _read_blob_pygit2(repo_path: str, spec: str) -> str | None:
+    # Only plain blobs are served in-process; trees and lookup errors go through `git show`
+    # so the output and error messages stay git's own.
+    opened = _pygit2_repo(repo_path)
+    if opened is None:
+        return None
+    pygit2, repo = opened
+    try:
+        obj = repo.revparse_single(spec)
+    except (pygit2.GitError, KeyError, ValueError):
+        return None
+    if not isinstance(obj, pygit2.Blob):
+        return None
+    return obj.data.decode("utf-8", errors="replace")
+
+
+@tool
+@cached_tool(cache_if=lambda arguments: _is_object_id(arguments["ref"]))
 def git_show_file(repo_path: str, file_path: str, ref: str = "HEAD", max_lines: int = 400) -> dict:
     """Read a file from a git repository at a given ref."""
     logger.info(
@@ -187,29 +497,33 @@ def git_show_file(repo_path: str, file_path: str, ref: str = "HEAD", max_lines:
         raise ValueError("max_lines must be > 0")
 
     spec = f"{ref}:{file_path}"
-    cmd = ["git", "-C", repo_path, "show", spec]
-    completed = subprocess.run(cmd, check=False, text=True, capture_output=True)
-    if completed.returncode != 0:
-        error = (completed.stderr or "").strip() or "git show failed"
-        logger.warning(
-            "Failed to read %s at %s in %s: %s.",
-            file_path,
-            ref,
-            repo_path,
-            error,
-        )
-        return {"error": error}
+    text = _read_blob_pygit2(repo_path, spec)
+    cut = False
+    if text is None:
+        cmd = ["git", "-C", repo_path, "show", spec]
+        try:
+            lines, cut = _stream_lines(cmd, max_lines)
+        except subprocess.CalledProcessError as exc:
+            error = (exc.stderr or "").strip() or "git show failed"
+            logger.warning(
+                "Failed to read %s at %s in %s: %s.",
+                file_path,
+                ref,
+                repo_path,
+                error,
+            )
+            return {"error": error}
+        text = "".join(lines)
+    # Content is the file's lines joined by "\n", without the trailing newline or "\r"s.
+    kept = text.splitlines()
+    truncated = cut or len(kept) > max_lines
+    content = "\n".join(kept[:max_lines]) + ("\n\n[file truncated]" if truncated else "")
 
-    lines = completed.stdout.splitlines()
-    truncated = False
-    if len(lines) > max_lines:
-        lines = lines[:max_lines]
-        truncated = True
     logger.info("File content was truncated: %s.", truncated)
     return {
         "ref": ref,
         "path": file_path,
-        "content": "\n".join(lines) + ("\n\n[file truncated]" if truncated else ""),
+        "content": content,
         "truncated": truncated,
     }
 
@@ -218,7 +532,7 @@ def git_show_file(repo_path: str, file_path: str, ref: str = "HEAD", max_lines:
 def git_grep(
     repo_path: str, pattern: str, max_matches: int = 50, fixed_string: bool = True
 ) -> list[dict]:
-    """Search tracked files in a git repository (via `git grep`)."""
+    """Search tracked files in a git repository (via `git grep`); fixed-string unless disabled."""
     pattern_preview = pattern if len(pattern) <= 120 else f"{pattern[:120]}..."
     logger.info(
         "Searching for %r in %s (fixed_string=%s, max_matches=%s).",
@@ -233,20 +547,20 @@ def git_grep(
     args = ["grep", "-n", "--full-name", "--no-color", "-I"]
     if fixed_string:
         args.append("-F")
-    args.append(pattern)
-
-    cmd = ["git", "-C", repo_path, *args]
-    completed = subprocess.run(cmd, check=False, text=True, capture_output=True)
-    if completed.returncode == 1:
-        return []
-    if completed.returncode != 0:
-        raise RuntimeError((completed.stderr or "").strip() or "git grep failed")
+    args += ["-e", pattern]
+    try:
+        # Each output line is one match, so the search stops as soon as we have enough.
+        lines, _ = _stream_lines(["git", "-C", repo_path, *args], max_matches)
+    except subprocess.CalledProcessError as exc:
+        if exc.returncode == 1:
+            return []
+        raise RuntimeError((exc.stderr or "").strip() or "git grep failed") from exc
 
     matches: list[dict] = []
-    for line in completed.stdout.splitlines():
+    for line in lines:
         # path:line:text
-        parts = line.split(":", 2)
-        if len(parts) != 3:
+        parts = line.rstrip("\n").split(":", 2)
+        if len(parts) != 3 or not parts[1].isdigit():
             continue
         path, line_no, text = parts
         matches.append({"path": path, "line": int(line_no), "text": text})
@@ -273,16 +587,11 @@ def git_diff(
     if path_filter:
         args += ["--", path_filter]
 
-    out = _run_git(repo_path, args).stdout
-    lines = out.splitlines()
-    truncated = False
-    if len(lines) > max_lines:
-        lines = lines[:max_lines]
-        truncated = True
+    diff, truncated = _run_git_stream(repo_path, args, max_lines, "\n\n[diff truncated]")
     return {
         "ref_a": ref_a,
         "ref_b": ref_b,
-        "diff": "\n".join(lines) + ("\n\n[diff truncated]" if truncated else ""),
+        "diff": diff,
         "truncated": truncated,
     }
 
@@ -299,22 +608,22 @@ def git_log_search(repo_path: str, pattern: str, max_count: int = 20) -> list[di
     if max_count <= 0:
         raise ValueError("max_count must be > 0")
 
-    fmt = "%H%x1f%s%x1f%ad%x1e"
+    fmt = "%H%x1f%s%x1f%ad"
     out = _run_git(
         repo_path,
         [
             "log",
+            "-z",
             f"--grep={pattern}",
             "--all",
             f"--max-count={max_count}",
             "--date=iso-strict",
-            f"--pretty=format:{fmt}",
+            f"--format={fmt}",
         ],
-    ).stdout
+    )
 
     results: list[dict] = []
-    for record in out.split("\x1e"):
-        record = record.strip()
+    for record in out.split("\0"):
         if not record:
             continue
         parts = record.split("\x1f")
@@ -342,15 +651,10 @@ def git_ls_files(repo_path: str, path_prefix: str = "", max_files: int = 200) ->
     if path_prefix:
         args.append(path_prefix)
 
-    out = _run_git(repo_path, args).stdout
-    files: list[str] = []
-    for line in out.splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        files.append(line)
-        if len(files) >= max_files:
-            break
+    _ensure_git_repo(repo_path)
+    lines, _ = _stream_lines(["git", "-C", repo_path, *args], max_files)
+    # ls-files prints one path per line and never emits blank lines.
+    files = [line.rstrip("\n") for line in lines]
     logger.info("Listed %s files.", len(files))
     return files
 
@@ -378,26 +682,33 @@ def ast_grep(
     if bin_path is None:
         return [{"error": "ast-grep is not installed (install via: cargo install ast-grep)"}]
 
-    args = [bin_path, "--pattern", pattern, "--json"]
+    # Stream one JSON object per match so ast-grep is stopped once we have enough.
+    args = [bin_path, "--pattern", pattern, "--json=stream"]
     if language:
         args += ["--lang", language]
     args += [repo_path]
 
-    completed = subprocess.run(args, check=False, text=True, capture_output=True)
-    if completed.returncode != 0 and not completed.stdout:
-        error = (completed.stderr or "").strip() or "ast-grep failed"
-        logger.warning("ast-grep failed: %s.", error)
-        return [{"error": error}]
+    try:
+        lines, _ = _stream_lines(args, max_matches)
+    except subprocess.CalledProcessError as exc:
+        error = (exc.stderr or "").strip()
+        if not exc.output and (exc.returncode != 1 or error):
+            error = error or "ast-grep failed"
+            logger.warning("ast-grep failed: %s.", error)
+            return [{"error": error}]
+        # Exit status 1 without stderr just means nothing matched.
+        lines = exc.output.splitlines(keepends=True)
 
     import json
 
-    try:
-        raw: list[dict] = json.loads(completed.stdout)
-    except json.JSONDecodeError:
-        return [{"error": "Failed to parse ast-grep JSON output"}]
-
     matches: list[dict] = []
-    for item in raw:
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            return [{"error": "Failed to parse ast-grep JSON output"}]
         matches.append(
             {
                 "file": item.get("file", ""),
@@ -405,7 +716,5 @@ def ast_grep(
                 "text": item.get("text", ""),
             }
         )
-        if len(matches) >= max_matches:
-            break
     logger.info("ast-grep found %s matches.", len(matches))
     return matches
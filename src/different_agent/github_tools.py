@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import http.client
 import json
 import logging
 import os
 import re
+import threading
 import urllib.error
 import urllib.parse
 import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 from typing import Any
@@ -14,9 +18,28 @@ from typing import Any
 from langchain_core.tools import tool
 
 from different_agent.git_tools import _run_git
+from different_agent.tool_cache import cached_tool
 
 logger = logging.getLogger(__name__)
 
+_BULK_MAX_WORKERS = 10
+_GITHUB_CACHE_TTL = 3600
+_GITHUB_API_HOST = "api.github.com"
+_GITHUB_TIMEOUT = 30
+# Idle keep-alive connections shared by every thread. Executor workers are discarded after
+# each bulk call, so connections live here rather than in thread-locals; at most
+# _BULK_MAX_WORKERS are kept and the rest are closed.
+_IDLE_CONNECTIONS: list[http.client.HTTPSConnection] = []
+_CONNECTIONS_LOCK = threading.Lock()
+# (url, Authorization) -> (ETag, decoded JSON, Link) for conditional re-requests; a 304 reply
+# is free of body transfer and parsing. Least recently used entries are evicted first.
+_ETAG_MAX_ENTRIES = 256
+_ETAG_CACHE: OrderedDict[tuple[str, str | None], tuple[str, Any, str | None]] = OrderedDict()
+_ETAG_LOCK = threading.Lock()
+# git@github.com:owner/repo.git
+_SSH_REMOTE_RE = re.compile(r"^git@github\.com:(?P<owner>[^/]+)/(?P<repo>[^/]+?)(?:\.git)?$")
+_LINK_LAST_PAGE_RE = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
 
 @dataclass(frozen=True)
 class GitHubRepo:
@@ -24,21 +47,26 @@ class GitHubRepo:
     repo: str
 
 
-_ANALYZED_PRS: set[tuple[str, str, int]] = set()
+_ANALYZED_PRS: dict[tuple[str, str], set[int]] = {}
+# PR tools run on executor threads for bulk fetches and the parallel target stage.
+_ANALYZED_LOCK = threading.Lock()
 
 
 def _record_analyzed_pr(owner: str | None, repo: str | None, number: int | None) -> None:
     if not owner or not repo or not isinstance(number, int):
         return
-    _ANALYZED_PRS.add((owner, repo, number))
+    with _ANALYZED_LOCK:
+        _ANALYZED_PRS.setdefault((owner, repo), set()).add(number)
 
 
 def get_analyzed_pr_count() -> int:
-    return len(_ANALYZED_PRS)
+    with _ANALYZED_LOCK:
+        return sum(len(numbers) for numbers in _ANALYZED_PRS.values())
 
 
 def reset_analyzed_pr_count() -> None:
-    _ANALYZED_PRS.clear()
+    with _ANALYZED_LOCK:
+        _ANALYZED_PRS.clear()
 
 
 def _github_token() -> str | None:
@@ -49,7 +77,7 @@ def _github_token() -> str | None:
     )
 
 
-def _github_request_json(url: str) -> Any:
+def _github_headers() -> dict[str, str]:
     headers = {
         "Accept": "application/vnd.github+json",
         "User-Agent": "different-agent",
@@ -57,11 +85,94 @@ def _github_request_json(url: str) -> Any:
     token = _github_token()
     if token:
         headers["Authorization"] = f"Bearer {token}"
+    return headers
+
 
+def _urlopen_json(url: str, headers: dict[str, str]) -> tuple[Any, str | None]:
     req = urllib.request.Request(url, headers=headers)
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        payload = resp.read().decode("utf-8")
-        return json.loads(payload)
+    with urllib.request.urlopen(req, timeout=_GITHUB_TIMEOUT) as resp:
+        return json.loads(resp.read()), resp.headers.get("Link")
+
+
+def _acquire_github_connection() -> http.client.HTTPSConnection:
+    with _CONNECTIONS_LOCK:
+        if _IDLE_CONNECTIONS:
+            return _IDLE_CONNECTIONS.pop()
+    return http.client.HTTPSConnection(_GITHUB_API_HOST, timeout=_GITHUB_TIMEOUT)
+
+
+def _release_github_connection(conn: http.client.HTTPSConnection) -> None:
+    with _CONNECTIONS_LOCK:
+        if len(_IDLE_CONNECTIONS) < _BULK_MAX_WORKERS:
+            _IDLE_CONNECTIONS.append(conn)
+            return
+    conn.close()
+
+
+def _github_request_json(url: str) -> Any:
+    return _github_request_json_with_link(url)[0]
+
+
+def _github_request_json_with_link(url: str) -> tuple[Any, str | None]:
+    """GET a GitHub API URL and return (decoded JSON, `Link` response header).
+
+    HTTP errors raise `HTTPError`. Requests to api.github.com reuse a pooled keep-alive
+    connection instead of paying a TCP+TLS handshake each time, and revalidate earlier
+    responses by ETag; proxied setups and redirects go through urllib.
+    """
+    headers = _github_headers()
+    parts = urllib.parse.urlsplit(url)
+    if parts.hostname != _GITHUB_API_HOST or "https" in urllib.request.getproxies():
+        return _urlopen_json(url, headers)
+
+    target = f"{parts.path}?{parts.query}" if parts.query else parts.path
+    etag_key = (url, headers.get("Authorization"))
+    with _ETAG_LOCK:
+        cached = _ETAG_CACHE.get(etag_key)
+        if cached is not None:
+            _ETAG_CACHE.move_to_end(etag_key)
+    request_headers = headers if cached is None else {**headers, "If-None-Match": cached[0]}
+    for attempt in range(2):
+        conn = _acquire_github_connection()
+        try:
+            conn.request("GET", target, headers=request_headers)
+            resp = conn.getresponse()
+            body = resp.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            # GitHub closed the idle keep-alive connection; retry once on a fresh one.
+            conn.close()
+            if attempt:
+                raise
+            continue
+        except Exception:
+            conn.close()
+            raise
+        break
+    if resp.will_close:
+        conn.close()
+    else:
+        _release_github_connection(conn)
+    if resp.status == 304 and cached is not None:
+        return cached[1], cached[2]
+    if 300 <= resp.status < 400:
+        return _urlopen_json(url, headers)
+    if resp.status >= 400:
+        raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, None)
+    data, link = json.loads(body), resp.headers.get("Link")
+    etag = resp.headers.get("ETag")
+    if etag:
+        with _ETAG_LOCK:
+            _ETAG_CACHE[etag_key] = (etag, data, link)
+            _ETAG_CACHE.move_to_end(etag_key)
+            if len(_ETAG_CACHE) > _ETAG_MAX_ENTRIES:
+                _ETAG_CACHE.popitem(last=False)
+    return data, link
+
+
+def _link_last_page(link: str | None) -> int | None:
+    """Page number of the `rel="last"` entry in a GitHub `Link` header, if any."""
+    m = _LINK_LAST_PAGE_RE.search(link or "")
+    return int(m.group(1)) if m else None
 
 
 def _iso_since_days(since_days: int) -> str:
@@ -74,8 +185,7 @@ def _parse_github_repo_from_remote(remote_url: str) -> GitHubRepo | None:
     if not remote_url:
         return None
 
-    # git@github.com:owner/repo.git
-    m = re.match(r"^git@github\.com:(?P<owner>[^/]+)/(?P<repo>[^/]+?)(?:\.git)?$", remote_url)
+    m = _SSH_REMOTE_RE.match(remote_url)
     if m:
         return GitHubRepo(owner=m.group("owner"), repo=m.group("repo"))
 
@@ -99,12 +209,47 @@ def _parse_github_repo_from_remote(remote_url: str) -> GitHubRepo | None:
     return GitHubRepo(owner=owner, repo=repo)
 
 
+def _label_names(item: dict) -> list:
+    return [label.get("name") for label in item.get("labels", []) if isinstance(label, dict)]
+
+
+def _issue_fields(item: dict, body_limit: int) -> dict:
+    get = item.get
+    return {
+        "number": get("number"),
+        "title": get("title"),
+        "state": get("state"),
+        "labels": _label_names(item),
+        "closed_at": get("closed_at"),
+        "updated_at": get("updated_at"),
+        "html_url": get("html_url"),
+        "body": (get("body") or "")[:body_limit],
+    }
+
+
+def _pr_fields(item: dict, body_limit: int | None = None) -> dict:
+    """Project a GitHub pull payload; the body is only included when `body_limit` is given."""
+    get = item.get
+    fields = {
+        "number": get("number"),
+        "title": get("title"),
+        "state": get("state"),
+        "labels": _label_names(item),
+        "merged_at": get("merged_at"),
+        "updated_at": get("updated_at"),
+        "html_url": get("html_url"),
+    }
+    if body_limit is not None:
+        fields["body"] = (get("body") or "")[:body_limit]
+    return fields
+
+
 @tool
 def git_github_repo(repo_path: str, remote: str = "origin") -> dict:
     """Resolve a local repo's GitHub {owner, repo} from its git remote URL."""
     logger.info("Resolving GitHub repo from %s (remote=%s).", repo_path, remote)
     try:
-        out = _run_git(repo_path, ["remote", "get-url", remote]).stdout.strip()
+        out = _run_git(repo_path, ["remote", "get-url", remote]).strip()
     except Exception as e:
         return {"error": f"Failed to read git remote '{remote}': {e}"}
     resolved = _parse_github_repo_from_remote(out)
@@ -114,6 +259,7 @@ def git_github_repo(repo_path: str, remote: str = "origin") -> dict:
 
 
 @tool
+@cached_tool(ttl=_GITHUB_CACHE_TTL)
 def github_recent_issues(
     owner: str, repo: str, since_days: int = 30, max_count: int = 50
 ) -> list[dict]:
@@ -149,26 +295,24 @@ def github_recent_issues(
             continue
         if "pull_request" in item:
             continue
-        results.append(
-            {
-                "number": item.get("number"),
-                "title": item.get("title"),
-                "state": item.get("state"),
-                "labels": [
-                    label.get("name") for label in item.get("labels", []) if isinstance(label, dict)
-                ],
-                "closed_at": item.get("closed_at"),
-                "updated_at": item.get("updated_at"),
-                "html_url": item.get("html_url"),
-                "body": (item.get("body") or "")[:4000],
-            }
-        )
+        results.append(_issue_fields(item, body_limit=4000))
         if len(results) >= max_count:
             break
     logger.info("Fetched %s issues.", len(results))
     return results
 
 
+def _request_pr_or_none(owner: str, repo: str, number: int) -> Any:
+    """Raw `GET /pulls/{number}` payload, or None when the PR doesn't exist."""
+    url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{number}"
+    try:
+        return _github_request_json(url)
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            return None
+        raise
+
+
 @tool
 def github_recent_prs(
     owner: str,
@@ -179,6 +323,22 @@ def github_recent_prs(
     to_pr: int | None = None,
 ) -> list[dict]:
     """Fetch recent merged/closed PRs from GitHub (optionally by PR number range)."""
+    results = _recent_prs(owner, repo, since_days, max_count, from_pr, to_pr)
+    # Recorded outside the cache so repeated lookups still count toward this run's tally.
+    for pr in results:
+        _record_analyzed_pr(owner, repo, pr.get("number"))
+    return results
+
+
+@cached_tool(ttl=_GITHUB_CACHE_TTL)
+def _recent_prs(
+    owner: str,
+    repo: str,
+    since_days: int,
+    max_count: int,
+    from_pr: int | None,
+    to_pr: int | None,
+) -> list[dict]:
     logger.info(
         "Fetching recent PRs for %s/%s (since_days=%s, max_count=%s, from_pr=%s, to_pr=%s).",
         owner,
@@ -196,38 +356,27 @@ def github_recent_prs(
         if from_pr > to_pr:
             return [{"error": "from_pr must be <= to_pr"}]
         results: list[dict] = []
-        for number in range(from_pr, to_pr + 1):
-            url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{number}"
-            try:
-                item = _github_request_json(url)
-            except urllib.error.HTTPError as e:
-                if e.code == 404:
-                    continue
-                return [{"error": f"GitHub request failed: {e}"}]
-            except Exception as e:
-                return [{"error": f"GitHub request failed: {e}"}]
-            if not isinstance(item, dict):
-                continue
-            if item.get("state") != "closed":
-                continue
-            results.append(
-                {
-                    "number": item.get("number"),
-                    "title": item.get("title"),
-                    "state": item.get("state"),
-                    "labels": [
-                        label.get("name")
-                        for label in item.get("labels", [])
-                        if isinstance(label, dict)
-                    ],
-                    "merged_at": item.get("merged_at"),
-                    "updated_at": item.get("updated_at"),
-                    "html_url": item.get("html_url"),
-                }
-            )
-            _record_analyzed_pr(owner, repo, item.get("number"))
-            if len(results) >= max_count:
-                break
+        numbers = range(from_pr, to_pr + 1)
+        workers = min(_BULK_MAX_WORKERS, len(numbers))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Fetch a batch at a time and consume it in PR order, so max_count still stops
+            # the scan early and the first failing PR is the one reported.
+            for start in range(0, len(numbers), workers):
+                batch = numbers[start : start + workers]
+                items = pool.map(lambda number: _request_pr_or_none(owner, repo, number), batch)
+                try:
+                    for item in items:
+                        if not isinstance(item, dict):
+                            continue
+                        if item.get("state") != "closed":
+                            continue
+                        results.append(_pr_fields(item))
+                        if len(results) >= max_count:
+                            break
+                except Exception as e:
+                    return [{"error": f"GitHub request failed: {e}"}]
+                if len(results) >= max_count:
+                    break
         logger.info("Fetched %s PRs.", len(results))
         return results
 
@@ -261,21 +410,12 @@ def github_recent_prs(
             except ValueError:
                 dt = None
             if dt is not None and dt < threshold:
+                # The page is sorted by updated_at desc and merged_at never exceeds it, so
+                # once updated_at is too old every remaining PR is too.
+                if date_str == updated_at:
+                    break
                 continue
-        results.append(
-            {
-                "number": item.get("number"),
-                "title": item.get("title"),
-                "state": item.get("state"),
-                "labels": [
-                    label.get("name") for label in item.get("labels", []) if isinstance(label, dict)
-                ],
-                "merged_at": merged_at,
-                "updated_at": updated_at,
-                "html_url": item.get("html_url"),
-            }
-        )
-        _record_analyzed_pr(owner, repo, item.get("number"))
+        results.append(_pr_fields(item))
         if len(results) >= max_count:
             break
     logger.info("Fetched %s PRs.", len(results))
@@ -283,6 +423,7 @@ def github_recent_prs(
 
 
 @tool
+@cached_tool(ttl=_GITHUB_CACHE_TTL)
 def github_fetch_issue(owner: str, repo: str, number: int) -> dict:
     """Fetch one issue from GitHub."""
     logger.info(
@@ -298,21 +439,22 @@ def github_fetch_issue(owner: str, repo: str, number: int) -> dict:
         return {"error": f"GitHub request failed: {e}"}
     if not isinstance(item, dict):
         return {"error": "Unexpected response from GitHub issue API"}
-    return {
-        "number": item.get("number"),
-        "title": item.get("title"),
-        "state": item.get("state"),
-        "labels": [
-            label.get("name") for label in item.get("labels", []) if isinstance(label, dict)
-        ],
-        "closed_at": item.get("closed_at"),
-        "updated_at": item.get("updated_at"),
-        "html_url": item.get("html_url"),
-        "body": (item.get("body") or "")[:12000],
-    }
+    return _issue_fields(item, body_limit=12000)
+
+
+def _fetch_pr(owner: str, repo: str, number: int) -> dict:
+    url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{number}"
+    try:
+        item = _github_request_json(url)
+    except Exception as e:
+        return {"error": f"GitHub request failed: {e}"}
+    if not isinstance(item, dict):
+        return {"error": "Unexpected response from GitHub pull API"}
+    return _pr_fields(item, body_limit=12000)
 
 
 @tool
+@cached_tool(ttl=_GITHUB_CACHE_TTL)
 def github_fetch_pr(owner: str, repo: str, number: int) -> dict:
     """Fetch one PR from GitHub (metadata)."""
     logger.info(
@@ -321,30 +463,39 @@ def github_fetch_pr(owner: str, repo: str, number: int) -> dict:
         owner,
         repo,
     )
-    url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{number}"
-    try:
-        item = _github_request_json(url)
-    except Exception as e:
-        return {"error": f"GitHub request failed: {e}"}
-    if not isinstance(item, dict):
-        return {"error": "Unexpected response from GitHub pull API"}
-    return {
-        "number": item.get("number"),
-        "title": item.get("title"),
-        "state": item.get("state"),
-        "labels": [
-            label.get("name") for label in item.get("labels", []) if isinstance(label, dict)
-        ],
-        "merged_at": item.get("merged_at"),
-        "updated_at": item.get("updated_at"),
-        "html_url": item.get("html_url"),
-        "body": (item.get("body") or "")[:12000],
-    }
+    return _fetch_pr(owner, repo, number)
+
+
+@tool
+def github_fetch_prs_bulk(owner: str, repo: str, numbers: list[int]) -> list[dict]:
+    """Fetch several PRs from GitHub (metadata) concurrently, in the order given."""
+    logger.info(
+        "Fetching %s PRs for %s/%s (max_workers=%s).",
+        len(numbers),
+        owner,
+        repo,
+        _BULK_MAX_WORKERS,
+    )
+    if not numbers:
+        return []
+    with ThreadPoolExecutor(max_workers=min(_BULK_MAX_WORKERS, len(numbers))) as pool:
+        results = list(pool.map(lambda number: _fetch_pr(owner, repo, number), numbers))
+    logger.info("Fetched %s PRs.", len(results))
+    return results
 
 
 @tool
 def github_fetch_pr_files(owner: str, repo: str, number: int, max_files: int = 200) -> list[dict]:
     """Fetch PR changed files (+ per-file patch snippets when available)."""
+    files = _pr_files(owner, repo, number, max_files)
+    if not (files and "error" in files[0]):
+        # Recorded outside the cache so repeated lookups still count toward this run's tally.
+        _record_analyzed_pr(owner, repo, number)
+    return files
+
+
+@cached_tool(ttl=_GITHUB_CACHE_TTL)
+def _pr_files(owner: str, repo: str, number: int, max_files: int) -> list[dict]:
     logger.info(
         "Fetching files for PR #%s in %s/%s (max_files=%s).",
         number,
@@ -352,21 +503,44 @@ def github_fetch_pr_files(owner: str, repo: str, number: int, max_files: int = 2
         repo,
         max_files,
     )
-    files: list[dict] = []
-    page = 1
+    if max_files <= 0:
+        return []
     per_page = 100
-    while len(files) < max_files:
+    base_url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{number}/files"
+
+    def fetch_page(page: int) -> tuple[Any, str | None]:
         query = urllib.parse.urlencode({"per_page": str(per_page), "page": str(page)})
-        url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{number}/files?{query}"
-        try:
-            items = _github_request_json(url)
-        except Exception as e:
-            return [{"error": f"GitHub request failed: {e}"}]
-        if not isinstance(items, list):
-            break
-        if not items:
+        return _github_request_json_with_link(f"{base_url}?{query}")
+
+    max_pages = -(-max_files // per_page)
+    try:
+        items, link = fetch_page(1)
+        pages = [items]
+        if isinstance(items, list) and len(items) >= per_page and max_pages > 1:
+            last_page = _link_last_page(link)
+            if last_page is not None:
+                # The first response names the last page, so fetch the rest concurrently.
+                numbers = range(2, min(last_page, max_pages) + 1)
+                with ThreadPoolExecutor(
+                    max_workers=min(_BULK_MAX_WORKERS, max(len(numbers), 1))
+                ) as pool:
+                    pages += [page for page, _ in pool.map(fetch_page, numbers)]
+            else:
+                while len(items) >= per_page and len(pages) < max_pages:
+                    items, _ = fetch_page(len(pages) + 1)
+                    if not isinstance(items, list):
+                        break
+                    pages.append(items)
+    except Exception as e:
+        return [{"error": f"GitHub request failed: {e}"}]
+
+    files: list[dict] = []
+    for items in pages:
+        if not isinstance(items, list) or not items or len(files) >= max_files:
             break
         for item in items:
+            if len(files) >= max_files:
+                break
             if not isinstance(item, dict):
                 continue
             patch = item.get("patch")
@@ -382,10 +556,6 @@ def github_fetch_pr_files(owner: str, repo: str, number: int, max_files: int = 2
                     "patch": patch,
                 }
             )
-            if len(files) >= max_files:
-                break
-        page += 1
-    _record_analyzed_pr(owner, repo, number)
     return files
 
 
@@ -8,6 +8,11 @@ from langchain_core.language_models import BaseChatModel
 
 logger = logging.getLogger(__name__)
 
+# OpenAI caches repeated prompt prefixes automatically; a stable key routes requests that share
+# our static system prompts to the same cache. Anthropic caching is handled by DeepAgents'
+# prompt-caching middleware.
+_OPENAI_PROMPT_CACHE_KEY = "different-agent"
+
 
 @dataclass(frozen=True)
 class ResolvedModel:
@@ -16,24 +21,30 @@ class ResolvedModel:
     name: str
 
 
+_KNOWN_PROVIDERS = frozenset({"openai", "anthropic", "google", "vertexai"})
+# Substrings of bare model names, checked in order, that identify the provider.
+_PROVIDER_NAME_HINTS = ((("gpt", "o1", "o3"), "openai"), (("claude",), "anthropic"))
+
+
+def _split_provider_prefix(model_name: str) -> tuple[str | None, str]:
+    maybe_provider, sep, rest = model_name.partition(":")
+    if sep and maybe_provider in _KNOWN_PROVIDERS:
+        return maybe_provider, rest
+    return None, model_name
+
+
 def _strip_provider_prefix(model_name: str) -> str:
-    if ":" in model_name:
-        maybe_provider, rest = model_name.split(":", 1)
-        if maybe_provider in {"openai", "anthropic", "google", "vertexai"}:
-            return rest
-    return model_name
+    return _split_provider_prefix(model_name)[1]
 
 
 def _detect_provider(model_name: str, provider_hint: str | None = None) -> str:
-    if ":" in model_name:
-        maybe_provider, _rest = model_name.split(":", 1)
-        if maybe_provider in {"openai", "anthropic", "google", "vertexai"}:
-            return maybe_provider
+    prefix, _rest = _split_provider_prefix(model_name)
+    if prefix is not None:
+        return prefix
     lower = model_name.lower()
-    if any(x in lower for x in ("gpt", "o1", "o3")):
-        return "openai"
-    if "claude" in lower:
-        return "anthropic"
+    for needles, provider in _PROVIDER_NAME_HINTS:
+        if any(needle in lower for needle in needles):
+            return provider
     if provider_hint:
         return provider_hint
     raise ValueError(f"Could not detect provider from model name: {model_name}")
@@ -46,8 +57,8 @@ def create_chat_model(
     temperature: float = 0.0,
     reasoning_effort: str | None = None,
 ) -> ResolvedModel:
-    provider = _detect_provider(model_name, provider_hint=provider)
-    raw_name = _strip_provider_prefix(model_name)
+    prefix, raw_name = _split_provider_prefix(model_name)
+    provider = prefix or _detect_provider(model_name, provider_hint=provider)
     logger.info("Creating chat model %s (provider=%s).", raw_name, provider)
 
     if provider == "openai":
@@ -60,6 +71,7 @@ def create_chat_model(
                 model_name=raw_name,
                 temperature=temperature,
                 reasoning_effort=reasoning_effort,
+                model_kwargs={"prompt_cache_key": _OPENAI_PROMPT_CACHE_KEY},
             ),
             provider=provider,
             name=raw_name,
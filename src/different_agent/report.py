@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import html
+from collections.abc import Iterable
 from datetime import UTC, datetime
 from typing import Any
 
@@ -8,40 +9,16 @@ from typing import Any
 def _safe_json(value: Any) -> str:
     if value is None:
         return ""
-    if isinstance(value, (str, int, float, bool)):
-        return html.escape(str(value))
-    return html.escape(str(value))
+    return html.escape(value if isinstance(value, str) else str(value))
 
 
-def render_findings_html(findings: list[dict]) -> str:
-    now = datetime.now(UTC).replace(microsecond=0).isoformat()
-    rows = []
-    for f in findings:
-        kind = f.get("kind")
-        severity = f.get("severity")
-        show_risk_fields = kind == "bug" and severity not in (None, "", "unknown")
-        main_file = f.get("main_file") if show_risk_fields else ""
-        exploit_risk = f.get("exploit_risk") if show_risk_fields else ""
-        rows.append(
-            "<tr>"
-            f"<td>{_safe_json(f.get('id'))}</td>"
-            f"<td>{_safe_json(f.get('kind'))}</td>"
-            f"<td>{_safe_json(f.get('severity'))}</td>"
-            f"<td>{_safe_json(f.get('title'))}</td>"
-            f"<td><pre>{_safe_json(f.get('root_cause'))}</pre></td>"
-            f"<td><pre>{_safe_json(f.get('fix_summary'))}</pre></td>"
-            f"<td>{_safe_json(main_file)}</td>"
-            f"<td><pre>{_safe_json(exploit_risk)}</pre></td>"
-            "</tr>"
-        )
-
-    table = "\n".join(rows)
-    return f"""<!doctype html>
+# Static page chrome, built once; only the timestamp, header cells and rows vary per report.
+_PAGE_HEAD = """<!doctype html>
 <html lang="en">
   <head>
     <meta charset="utf-8" />
     <meta name="viewport" content="width=device-width, initial-scale=1" />
-    <title>Different Agent – Findings</title>
+    <title>Different Agent – {title}</title>
     <style>
       body {{ font-family: -apple-system, BlinkMacSystemFont, Segoe UI, Roboto, sans-serif; margin: 24px; }}
       h1 {{ margin: 0 0 8px; }}
@@ -54,23 +31,17 @@ def render_findings_html(findings: list[dict]) -> str:
     </style>
   </head>
   <body>
-    <h1>Findings</h1>
-    <p class="meta">Generated at <code>{html.escape(now)}</code></p>
+    <h1>{title}</h1>
+    <p class="meta">Generated at <code>{now}</code></p>
     <table>
       <thead>
         <tr>
-          <th>id</th>
-          <th>kind</th>
-          <th>severity</th>
-          <th>title</th>
-          <th>root_cause</th>
-          <th>fix_summary</th>
-          <th>main_file</th>
-          <th>exploit_risk</th>
-        </tr>
+"""
+_PAGE_BODY = """        </tr>
       </thead>
       <tbody>
-        {table}
+        """
+_PAGE_TAIL = """
       </tbody>
     </table>
   </body>
@@ -78,53 +49,70 @@ def render_findings_html(findings: list[dict]) -> str:
 """
 
 
-def render_target_assessment_html(assessments: list[dict]) -> str:
+def _render_page(title: str, columns: tuple[str, ...], rows: Iterable[str]) -> str:
     now = datetime.now(UTC).replace(microsecond=0).isoformat()
-    rows = []
-    for a in assessments:
-        rows.append(
-            "<tr>"
-            f"<td>{_safe_json(a.get('finding_id'))}</td>"
-            f"<td>{_safe_json(a.get('applies'))}</td>"
-            f"<td>{_safe_json(a.get('confidence'))}</td>"
-            f"<td><pre>{_safe_json(a.get('why'))}</pre></td>"
-            "</tr>"
+    return "".join(
+        (
+            _PAGE_HEAD.format(title=title, now=html.escape(now)),
+            *(f"          <th>{column}</th>\n" for column in columns),
+            _PAGE_BODY,
+            "\n".join(rows),
+            _PAGE_TAIL,
         )
+    )
 
-    table = "\n".join(rows)
-    return f"""<!doctype html>
-<html lang="en">
-  <head>
-    <meta charset="utf-8" />
-    <meta name="viewport" content="width=device-width, initial-scale=1" />
-    <title>Different Agent – Target Assessment</title>
-    <style>
-      body {{ font-family: -apple-system, BlinkMacSystemFont, Segoe UI, Roboto, sans-serif; margin: 24px; }}
-      h1 {{ margin: 0 0 8px; }}
-      .meta {{ color: #666; margin: 0 0 16px; }}
-      table {{ border-collapse: collapse; width: 100%; }}
-      th, td {{ border: 1px solid #ddd; padding: 8px; vertical-align: top; }}
-      th {{ background: #f7f7f7; text-align: left; }}
-      pre {{ white-space: pre-wrap; margin: 0; }}
-      code {{ background: #f5f5f5; padding: 2px 4px; border-radius: 4px; }}
-    </style>
-  </head>
-  <body>
-    <h1>Target Assessment</h1>
-    <p class="meta">Generated at <code>{html.escape(now)}</code></p>
-    <table>
-      <thead>
-        <tr>
-          <th>finding_id</th>
-          <th>applies</th>
-          <th>confidence</th>
-          <th>why</th>
-        </tr>
-      </thead>
-      <tbody>
-        {table}
-      </tbody>
-    </table>
-  </body>
-</html>
-"""
+
+def _findings_row(f: dict) -> str:
+    kind = f.get("kind")
+    severity = f.get("severity")
+    show_risk_fields = kind == "bug" and severity not in (None, "", "unknown")
+    main_file = f.get("main_file") if show_risk_fields else ""
+    exploit_risk = f.get("exploit_risk") if show_risk_fields else ""
+    return (
+        "<tr>"
+        f"<td>{_safe_json(f.get('id'))}</td>"
+        f"<td>{_safe_json(kind)}</td>"
+        f"<td>{_safe_json(severity)}</td>"
+        f"<td>{_safe_json(f.get('title'))}</td>"
+        f"<td><pre>{_safe_json(f.get('root_cause'))}</pre></td>"
+        f"<td><pre>{_safe_json(f.get('fix_summary'))}</pre></td>"
+        f"<td>{_safe_json(main_file)}</td>"
+        f"<td><pre>{_safe_json(exploit_risk)}</pre></td>"
+        "</tr>"
+    )
+
+
+def _assessment_row(a: dict) -> str:
+    return (
+        "<tr>"
+        f"<td>{_safe_json(a.get('finding_id'))}</td>"
+        f"<td>{_safe_json(a.get('applies'))}</td>"
+        f"<td>{_safe_json(a.get('confidence'))}</td>"
+        f"<td><pre>{_safe_json(a.get('why'))}</pre></td>"
+        "</tr>"
+    )
+
+
+def render_findings_html(findings: list[dict]) -> str:
+    return _render_page(
+        "Findings",
+        (
+            "id",
+            "kind",
+            "severity",
+            "title",
+            "root_cause",
+            "fix_summary",
+            "main_file",
+            "exploit_risk",
+        ),
+        map(_findings_row, findings),
+    )
+
+
+def render_target_assessment_html(assessments: list[dict]) -> str:
+    return _render_page(
+        "Target Assessment",
+        ("finding_id", "applies", "confidence", "why"),
+        map(_assessment_row, assessments),
+    )
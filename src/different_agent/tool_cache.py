@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import copy
+import functools
+import inspect
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_MAX_ENTRIES = 256
+_CACHES: list[dict[Any, tuple[float | None, Any]]] = []
+
+
+def clear_tool_caches() -> None:
+    for cache in _CACHES:
+        cache.clear()
+
+
+def _is_error_result(result: Any) -> bool:
+    if isinstance(result, dict):
+        return "error" in result
+    if isinstance(result, list) and result and isinstance(result[0], dict):
+        return "error" in result[0]
+    return False
+
+
+def cached_tool(
+    ttl: float | None = None, cache_if: Callable[[dict[str, Any]], bool] | None = None
+) -> Callable[[F], F]:
+    """Memoize a tool function's results in-process for `ttl` seconds (None = forever).
+
+    Error results are never cached, and callers always receive a deep copy. With
+    `cache_if`, only calls whose bound arguments (defaults applied) satisfy it are memoized.
+    """
+
+    def decorator(func: F) -> F:
+        cache: dict[Any, tuple[float | None, Any]] = {}
+        lock = threading.Lock()
+        signature = inspect.signature(func)
+        _CACHES.append(cache)
+
+        def should_cache(args: tuple[Any, ...], kwargs: dict[str, Any]) -> bool:
+            if cache_if is None:
+                return True
+            try:
+                bound = signature.bind(*args, **kwargs)
+            except TypeError:
+                return False
+            bound.apply_defaults()
+            return cache_if(bound.arguments)
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not should_cache(args, kwargs):
+                return func(*args, **kwargs)
+            try:
+                key = (args, tuple(sorted(kwargs.items())))
+                hash(key)
+            except TypeError:
+                return func(*args, **kwargs)
+            now = time.monotonic()
+            with lock:
+                entry = cache.get(key)
+                if entry is not None and entry[0] is not None and entry[0] <= now:
+                    del cache[key]
+                    entry = None
+            if entry is not None:
+                logger.debug("Tool cache hit for %s.", func.__name__)
+                return copy.deepcopy(entry[1])
+            result = func(*args, **kwargs)
+            if not _is_error_result(result):
+                value = copy.deepcopy(result)
+                with lock:
+                    if len(cache) >= _MAX_ENTRIES:
+                        del cache[next(iter(cache))]
+                    cache[key] = (None if ttl is None else now + ttl, value)
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
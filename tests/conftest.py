@@ -7,6 +7,8 @@ from pathlib import Path
 
 import pytest
 
+from different_agent.tool_cache import clear_tool_caches
+
 
 def _git_env() -> dict[str, str]:
     env = os.environ.copy()
@@ -40,15 +42,28 @@ def init_git_repo(repo_path: Path) -> Path:
     return repo_path
 
 
+@pytest.fixture(autouse=True)
+def _clear_tool_caches():
+    clear_tool_caches()
+    yield
+    clear_tool_caches()
+
+
+@pytest.fixture(scope="session")
+def _git_repo_template(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    # Initialized once per session; tests get a copy instead of spawning git three times.
+    return init_git_repo(tmp_path_factory.mktemp("template") / "repo")
+
+
 @pytest.fixture
-def git_repo(tmp_path: Path) -> Path:
-    return init_git_repo(tmp_path / "repo")
+def git_repo(tmp_path: Path, _git_repo_template: Path) -> Path:
+    return Path(shutil.copytree(_git_repo_template, tmp_path / "repo", symlinks=True))
 
 
 @pytest.fixture
-def make_git_repo(tmp_path: Path):
+def make_git_repo(tmp_path: Path, _git_repo_template: Path):
     def _make(name: str) -> Path:
-        return init_git_repo(tmp_path / name)
+        return Path(shutil.copytree(_git_repo_template, tmp_path / name, symlinks=True))
 
     return _make
 
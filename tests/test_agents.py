@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from different_agent import agents
+
+
+@pytest.fixture
+def fake_create_deep_agent(monkeypatch: pytest.MonkeyPatch) -> list[dict]:
+    calls: list[dict] = []
+
+    def fake(**kwargs):
+        calls.append(kwargs)
+        return object()
+
+    agents.clear_agent_cache()
+    monkeypatch.setattr("deepagents.create_deep_agent", fake)
+    yield calls
+    agents.clear_agent_cache()
+
+
+def test_create_inspiration_agent_reuses_cached_agent(fake_create_deep_agent) -> None:
+    model = object()
+    first = agents.create_inspiration_agent(model)
+    second = agents.create_inspiration_agent(model)
+    assert first is second
+    assert len(fake_create_deep_agent) == 1
+
+    other = agents.create_inspiration_agent(model, include_commits=False, include_issues=False)
+    assert other is not first
+    assert len(fake_create_deep_agent) == 2
+    tool_names = {t.name for t in fake_create_deep_agent[1]["tools"]}
+    assert "git_recent_commits" not in tool_names
+    assert "github_recent_issues" not in tool_names
+
+
+def test_create_target_agent_keys_on_model_identity(fake_create_deep_agent) -> None:
+    first = agents.create_target_agent(object())
+    second = agents.create_target_agent(object())
+    assert first is not second
+    assert len(fake_create_deep_agent) == 2
+
+
+def test_agents_share_response_strategies(fake_create_deep_agent) -> None:
+    agents.create_inspiration_agent(object())
+    agents.create_target_agent(object())
+    agents.create_inspiration_agent(object())
+    first, target, second = fake_create_deep_agent
+    assert first["response_format"] is second["response_format"]
+    assert first["response_format"].schema is agents.FindingsResponse
+    assert target["response_format"].schema is agents.TargetAssessmentsResponse
+
+
+def test_load_prompt_substitutes_schema_version() -> None:
+    for name in ("inspiration", "target"):
+        prompt = agents._load_prompt(name)
+        assert f"schema: {agents.FINDING_SCHEMA_VERSION}" in prompt
+        assert "{schema_version}" not in prompt
+
+
+def test_assess_findings_parallel_bounds_concurrency_and_keeps_order() -> None:
+    class FakeAgent:
+        def __init__(self) -> None:
+            self.active = 0
+            self.peak = 0
+
+        async def ainvoke(self, payload: dict):
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            await asyncio.sleep(0)
+            self.active -= 1
+            content = payload["files"]["/inputs/finding.json"]["content"]
+            finding = json.loads("\n".join(content))
+            if finding["id"] == "boom":
+                raise RuntimeError("boom")
+            return {"id": finding["id"]}
+
+    agent = FakeAgent()
+    findings = [{"id": "a"}, {"id": "boom"}, {"id": "c"}, {"id": "d"}]
+    results = asyncio.run(
+        agents.assess_findings_parallel(agent, "/repo", findings, max_concurrency=2)
+    )
+    assert results[0] == {"id": "a"}
+    assert isinstance(results[1], RuntimeError)
+    assert results[2:] == [{"id": "c"}, {"id": "d"}]
+    assert agent.peak == 2
+
+
+def test_findings_response_validates_slotted_evidence() -> None:
+    response = agents.FindingsResponse.model_validate(
+        {
+            "findings": [
+                {
+                    "id": "F-1",
+                    "kind": "hardening",
+                    "title": "Title",
+                    "severity": "unknown",
+                    "root_cause": "Root",
+                    "fix_summary": "Fix",
+                    "evidence": {"commits": [{"sha": "abc", "subject": "fix", "date": "d"}]},
+                }
+            ]
+        }
+    )
+    evidence = response.findings[0].evidence
+    assert isinstance(evidence.commits[0], agents.EvidenceCommit)
+    assert not hasattr(evidence, "__dict__")
+    assert response.model_dump()["findings"][0]["evidence"] == {
+        "commits": [{"sha": "abc", "subject": "fix", "date": "d"}],
+        "files_changed": [],
+        "diff_snippets": [],
+        "links": [],
+    }
+
+
+def test_finding_requires_bug_risk_fields() -> None:
+    with pytest.raises(ValueError, match="main_file is required"):
+        agents.Finding.model_validate(
+            {
+                "id": "F-1",
+                "kind": "bug",
+                "title": "Title",
+                "severity": "high",
+                "root_cause": "Root",
+                "fix_summary": "Fix",
+                "evidence": {},
+            }
+        )
+
+
+def test_inspiration_prompt_only_mentions_enabled_tools(fake_create_deep_agent) -> None:
+    full = agents._inspiration_prompt(True, True)
+    assert "git_recent_commits(" in full
+    assert "github_recent_issues(" in full
+    assert "{commits_workflow}" not in full
+
+    pr_only = agents._inspiration_prompt(False, False)
+    assert "git_recent_commits" not in pr_only
+    assert "github_recent_issues" not in pr_only
+    assert "github_recent_prs(" in pr_only
+
+    agents.create_inspiration_agent(object(), include_commits=False, include_issues=False)
+    assert fake_create_deep_agent[0]["system_prompt"] == pr_only
+
+
+def test_target_agent_payload_is_single_line_json() -> None:
+    finding = {"id": "F-1", "root_cause": "line one\nline two \x1c"}
+    payload = agents.target_agent_payload("/repo", finding)
+    content = payload["files"]["/inputs/finding.json"]["content"]
+    assert len(content) == 1
+    assert json.loads("\n".join(content)) == finding
+
+
+def test_target_prompt_is_a_single_finding_contract() -> None:
+    prompt = agents._load_prompt("target")
+    assert "/inputs/finding.json" in prompt
+    assert "each finding" not in prompt.lower()
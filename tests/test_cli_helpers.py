@@ -1,15 +1,28 @@
 from __future__ import annotations
 
+import logging
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
-from types import SimpleNamespace
 
 import pytest
 
 from different_agent import cli
+from different_agent.agents import EvidenceCommit
 from different_agent.config import AppConfig, ExtractConfig, ModelConfig, ReportsConfig
 
 
+@dataclass(slots=True)
+class _Args:
+    model: str | None = None
+    since_days: int | None = None
+    since_date: str | None = None
+    from_pr: int | None = None
+    to_pr: int | None = None
+    max_commits: int | None = None
+    max_patch_lines: int | None = None
+
+
 def test_output_helpers() -> None:
     fixed = datetime(2024, 1, 2, 3, 4, tzinfo=UTC)
     assert cli._output_suffix(fixed) == "01-02_03-04"
@@ -27,6 +40,8 @@ def test_extract_state_file_and_structured_response() -> None:
     result = {"files": {"/outputs/findings.json": {"content": ["{", "}"]}}}
     assert cli._extract_state_file(result, "/outputs/findings.json") == "{\n}"
     assert cli._extract_state_file(result, "/outputs/missing.json") is None
+    joined = {"files": {"/outputs/findings.json": {"content": "{\n}"}}}
+    assert cli._extract_state_file(joined, "/outputs/findings.json") == "{\n}"
 
     class Dummy:
         def model_dump(self):
@@ -56,14 +71,15 @@ def test_sum_usage_and_cost() -> None:
     assert cli._sum_cost_from_results(results) == 0.5
 
 
-def test_apply_cli_overrides_with_since_date(monkeypatch: pytest.MonkeyPatch) -> None:
+class FixedDateTime(datetime):
     fixed_now = datetime(2024, 1, 10, tzinfo=UTC)
 
-    class FixedDateTime(datetime):
-        @classmethod
-        def now(cls, _tz=None):
-            return fixed_now
+    @classmethod
+    def now(cls, _tz=None):
+        return cls.fixed_now
+
 
+def test_apply_cli_overrides_with_since_date(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr(cli, "datetime", FixedDateTime)
 
     cfg = AppConfig(
@@ -71,55 +87,78 @@ def test_apply_cli_overrides_with_since_date(monkeypatch: pytest.MonkeyPatch) ->
         extract=ExtractConfig(since_days=30),
         reports=ReportsConfig(html=True),
     )
-    args = SimpleNamespace(
-        model=None,
-        since_days=None,
-        since_date="2024-01-05",
-        from_pr=None,
-        to_pr=None,
-        max_commits=None,
-        max_patch_lines=None,
-    )
+    args = _Args(since_date="2024-01-05")
     updated = cli._apply_cli_overrides(cfg, args)
     assert updated.extract.since_days == 5
     assert updated.extract.since_date == "2024-01-05"
 
 
+def test_apply_cli_overrides_without_overrides_returns_config() -> None:
+    cfg = AppConfig()
+    args = _Args()
+    assert cli._apply_cli_overrides(cfg, args) is cfg
+
+    bad = AppConfig(extract=ExtractConfig(from_pr=3, to_pr=None))
+    with pytest.raises(SystemExit, match="provided together"):
+        cli._apply_cli_overrides(bad, args)
+
+
 def test_apply_cli_overrides_rejects_bad_ranges() -> None:
     cfg = AppConfig()
-    args = SimpleNamespace(
-        model=None,
-        since_days=None,
-        since_date=None,
-        from_pr=10,
-        to_pr=None,
-        max_commits=None,
-        max_patch_lines=None,
-    )
+    args = _Args(from_pr=10)
     with pytest.raises(SystemExit, match="must be provided together"):
         cli._apply_cli_overrides(cfg, args)
 
-    args = SimpleNamespace(
-        model=None,
-        since_days=None,
-        since_date=None,
-        from_pr=2,
-        to_pr=1,
-        max_commits=None,
-        max_patch_lines=None,
-    )
+    args = _Args(from_pr=2, to_pr=1)
     with pytest.raises(SystemExit, match="must be <="):
         cli._apply_cli_overrides(cfg, args)
 
     future_date = (datetime.now(UTC) + timedelta(days=1)).date().isoformat()
-    args = SimpleNamespace(
-        model=None,
-        since_days=None,
-        since_date=future_date,
-        from_pr=None,
-        to_pr=None,
-        max_commits=None,
-        max_patch_lines=None,
-    )
+    args = _Args(since_date=future_date)
     with pytest.raises(SystemExit, match="since_date must be in the past"):
         cli._apply_cli_overrides(cfg, args)
+
+
+def test_collect_assessments_merges_and_skips_failures() -> None:
+    findings = [{"id": "F-1"}, {"id": "F-2"}, {"id": "F-3"}]
+    results = [
+        {"structured_response": {"assessments": [{"finding_id": "F-1"}]}},
+        RuntimeError("boom"),
+        {"files": {"/outputs/target_assessment.json": {"content": ['[{"finding_id": "F-3"}]']}}},
+    ]
+    assert cli._collect_assessments(findings, results) == [
+        {"finding_id": "F-1"},
+        {"finding_id": "F-3"},
+    ]
+
+    with pytest.raises(SystemExit, match="failed for every finding"):
+        cli._collect_assessments(findings[:1], [RuntimeError("boom")])
+
+
+def test_collect_assessments_skips_findings_without_output() -> None:
+    findings = [{"id": "F-1"}, {"id": "F-2"}, {"id": "F-3"}]
+    results = [
+        {"files": {}},
+        {"files": {"/outputs/target_assessment.json": {"content": ["not json"]}}},
+        {"files": {"/outputs/target_assessment.json": {"content": ['{"finding_id": "F-3"}']}}},
+    ]
+    assert cli._collect_assessments(findings, results) == [{"finding_id": "F-3"}]
+
+    with pytest.raises(SystemExit, match="failed for every finding"):
+        cli._collect_assessments(findings[:2], results[:2])
+
+
+def test_write_output_json_serializes_models(tmp_path: Path) -> None:
+    out = tmp_path / "nested" / "out.json"
+    cli._write_output_json(out, [{"sha": EvidenceCommit(sha="a", subject="é", date="d")}])
+    assert out.read_text(encoding="utf-8") == (
+        '[\n  {\n    "sha": {\n      "sha": "a",\n      "subject": "é",\n      "date": "d"\n'
+        "    }\n  }\n]\n"
+    )
+
+
+def test_color_formatter_colors_and_restores_levelname() -> None:
+    record = logging.LogRecord("x", logging.WARNING, __file__, 1, "msg", None, None)
+    formatted = cli._ColorFormatter("%(levelname)s %(message)s").format(record)
+    assert formatted == "\x1b[33mWARNING\x1b[0m msg"
+    assert record.levelname == "WARNING"
@@ -2,22 +2,37 @@ from __future__ import annotations
 
 import json
 import sys
+from contextlib import nullcontext
 from pathlib import Path
+from types import SimpleNamespace
 
 import pytest
 
 from different_agent import cli
 
-
-class DummyUsage:
-    def __init__(self) -> None:
-        self.usage_metadata: dict = {}
-
-    def __enter__(self):
-        return self
-
-    def __exit__(self, exc_type, exc, tb):
-        return False
+_FINDING_F1 = {
+    "id": "F-1",
+    "kind": "bug",
+    "severity": "low",
+    "title": "Sample",
+    "root_cause": "Root",
+    "fix_summary": "Fix",
+    "evidence": {"commits": [], "files_changed": [], "diff_snippets": [], "links": []},
+    "tags": [],
+}
+_FINDINGS_F2_JSON = json.dumps([{**_FINDING_F1, "id": "F-2", "severity": "medium"}])
+_ASSESSMENTS_F2_JSON = json.dumps(
+    [
+        {
+            "finding_id": "F-2",
+            "applies": False,
+            "confidence": 0.9,
+            "why": "Not applicable false positive",
+            "evidence": {},
+            "suggested_next_steps": [],
+        }
+    ]
+)
 
 
 class DummyStructured:
@@ -35,6 +50,9 @@ class StubAgent:
     def invoke(self, _payload: dict):
         return self._result
 
+    async def ainvoke(self, _payload: dict):
+        return self._result
+
 
 def _patch_main_dependencies(
     monkeypatch: pytest.MonkeyPatch,
@@ -47,32 +65,28 @@ def _patch_main_dependencies(
             self.provider = "openai"
             self.name = "gpt-5.2"
 
-    monkeypatch.setattr(cli, "get_usage_metadata_callback", lambda: DummyUsage())
-    monkeypatch.setattr(cli, "create_chat_model", lambda **_kw: DummyResolved())
+    # cli.main imports these lazily, so patch them where they are defined.
     monkeypatch.setattr(
-        cli, "create_inspiration_agent", lambda *_a, **_k: StubAgent(extract_result)
+        "langchain_core.callbacks.get_usage_metadata_callback",
+        lambda: nullcontext(SimpleNamespace(usage_metadata={})),
+    )
+    monkeypatch.setattr("different_agent.model.create_chat_model", lambda **_kw: DummyResolved())
+    monkeypatch.setattr(
+        "different_agent.agents.create_inspiration_agent",
+        lambda *_a, **_k: StubAgent(extract_result),
     )
     if target_result is not None:
-        monkeypatch.setattr(cli, "create_target_agent", lambda *_a, **_k: StubAgent(target_result))
+        monkeypatch.setattr(
+            "different_agent.agents.create_target_agent",
+            lambda *_a, **_k: StubAgent(target_result),
+        )
 
 
 def test_main_extract_only_writes_findings(
     make_git_repo, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
 ) -> None:
     repo = make_git_repo("inspiration")
-    findings = [
-        {
-            "id": "F-1",
-            "kind": "bug",
-            "severity": "low",
-            "title": "Sample",
-            "root_cause": "Root",
-            "fix_summary": "Fix",
-            "evidence": {"commits": [], "files_changed": [], "diff_snippets": [], "links": []},
-            "tags": [],
-        }
-    ]
-    extract_result = {"structured_response": DummyStructured({"findings": findings})}
+    extract_result = {"structured_response": DummyStructured({"findings": [_FINDING_F1]})}
     _patch_main_dependencies(monkeypatch, extract_result)
     monkeypatch.setattr(cli, "_output_suffix", lambda *_: "01-01_00-00")
 
@@ -92,7 +106,7 @@ def test_main_extract_only_writes_findings(
 
     assert cli.main() == 0
     output_path = tmp_path / "inspiration" / "findings_01-01_00-00.json"
-    data = json.loads(output_path.read_text(encoding="utf-8"))
+    data = json.loads(output_path.read_bytes())
     assert data[0]["id"] == "F-1"
 
 
@@ -102,35 +116,11 @@ def test_main_full_run_falls_back_to_state_files(
     inspiration = make_git_repo("inspiration")
     target = make_git_repo("target")
 
-    findings_json = json.dumps(
-        [
-            {
-                "id": "F-2",
-                "kind": "bug",
-                "severity": "medium",
-                "title": "Sample",
-                "root_cause": "Root",
-                "fix_summary": "Fix",
-                "evidence": {"commits": [], "files_changed": [], "diff_snippets": [], "links": []},
-                "tags": [],
-            }
-        ]
-    )
-    assessments_json = json.dumps(
-        [
-            {
-                "finding_id": "F-2",
-                "applies": False,
-                "confidence": 0.9,
-                "why": "Not applicable false positive",
-                "evidence": {},
-                "suggested_next_steps": [],
-            }
-        ]
-    )
-    extract_result = {"files": {"/outputs/findings.json": {"content": findings_json.splitlines()}}}
+    extract_result = {
+        "files": {"/outputs/findings.json": {"content": _FINDINGS_F2_JSON.splitlines()}}
+    }
     target_result = {
-        "files": {"/outputs/target_assessment.json": {"content": assessments_json.splitlines()}}
+        "files": {"/outputs/target_assessment.json": {"content": _ASSESSMENTS_F2_JSON}}
     }
 
     _patch_main_dependencies(monkeypatch, extract_result, target_result)
@@ -157,5 +147,78 @@ def test_main_full_run_falls_back_to_state_files(
     assert cli.main() == 0
     output_findings = tmp_path / "target" / "findings_01-01_00-00.json"
     output_assessment = tmp_path / "target" / "assessment_01-01_00-00.json"
-    assert json.loads(output_findings.read_text(encoding="utf-8"))[0]["id"] == "F-2"
-    assert json.loads(output_assessment.read_text(encoding="utf-8"))[0]["finding_id"] == "F-2"
+    assert json.loads(output_findings.read_bytes())[0]["id"] == "F-2"
+    assert json.loads(output_assessment.read_bytes())[0]["finding_id"] == "F-2"
+
+
+def test_cli_import_defers_llm_stack() -> None:
+    import subprocess
+
+    code = (
+        "import sys, different_agent.cli; "
+        "loaded = [m for m in ('langchain_core', 'langgraph', 'pydantic') if m in sys.modules]; "
+        "sys.exit(', '.join(loaded) or None)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=False
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_main_no_usage_skips_usage_callback(
+    make_git_repo, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    repo = make_git_repo("inspiration")
+    extract_result = {"structured_response": DummyStructured({"findings": []})}
+    _patch_main_dependencies(monkeypatch, extract_result)
+
+    def fail() -> None:
+        raise AssertionError("usage callback should not be created")
+
+    monkeypatch.setattr("langchain_core.callbacks.get_usage_metadata_callback", fail)
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "different-agent",
+            "--extract-only",
+            "--no-usage",
+            "--inspiration",
+            str(repo),
+            "--findings-out",
+            str(tmp_path / "findings.json"),
+        ],
+    )
+    assert cli.main() == 0
+
+
+def test_main_reports_findings_write_error_when_target_stage_fails(
+    make_git_repo, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    inspiration = make_git_repo("inspiration")
+    target = make_git_repo("target")
+    extract_result = {"structured_response": DummyStructured({"findings": [_FINDING_F1]})}
+    # No structured response and no state file: every finding fails.
+    _patch_main_dependencies(monkeypatch, extract_result, {"files": {}})
+
+    def failing_write(*_args) -> None:
+        raise OSError("findings-out is not writable")
+
+    monkeypatch.setattr(cli, "_write_findings_outputs", failing_write)
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "different-agent",
+            "--inspiration",
+            str(inspiration),
+            "--target",
+            str(target),
+            "--findings-out",
+            str(tmp_path / "findings.json"),
+        ],
+    )
+
+    with pytest.raises(OSError, match="not writable") as excinfo:
+        cli.main()
+    assert isinstance(excinfo.value.__context__, SystemExit)
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import os
+from dataclasses import fields
 from pathlib import Path
 
 import pytest
@@ -67,3 +69,68 @@ def test_load_config_rejects_invalid_table(tmp_path: Path) -> None:
 def test_get_table_rejects_non_table() -> None:
     with pytest.raises(ValueError, match=r"Config \[model\] must be a table/object"):
         _get_table({"model": "bad"}, "model")
+
+
+def test_load_config_reuses_parse_until_file_changes(tmp_path: Path) -> None:
+    path = tmp_path / "config.toml"
+    path.write_text('[model]\nname = "a"\n', encoding="utf-8")
+    first = load_config(path)
+    assert load_config(path) is first
+
+    path.write_text('[model]\nname = "bb"\n', encoding="utf-8")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert load_config(path).model.name == "bb"
+
+
+def test_load_config_keys_relative_paths_by_directory(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    first, second = tmp_path / "a" / "different.toml", tmp_path / "b" / "different.toml"
+    for path, name in ((first, "aa"), (second, "bb")):
+        path.parent.mkdir()
+        path.write_text(f'[model]\nname = "{name}"\n', encoding="utf-8")
+    st = first.stat()
+    os.utime(second, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    monkeypatch.chdir(first.parent)
+    assert load_config(Path("different.toml")).model.name == "aa"
+    monkeypatch.chdir(second.parent)
+    assert load_config(Path("different.toml")).model.name == "bb"
+
+
+def test_config_classes_are_slotted() -> None:
+    cfg = AppConfig()
+    for obj in (cfg, cfg.model, cfg.extract, cfg.reports):
+        assert not hasattr(obj, "__dict__")
+
+
+def test_config_fields_declare_type_checks() -> None:
+    cfg = AppConfig()
+    for section in (cfg.model, cfg.extract, cfg.reports):
+        for f in fields(section):
+            assert "check" in f.metadata, f"{type(section).__name__}.{f.name}"
+
+
+@pytest.mark.parametrize(
+    ("toml", "message"),
+    [
+        ("[model]\ntemperature = 'hot'", "must be a float: model.temperature"),
+        ("[model]\nreasoning_effort = 3", "must be a string or null: model.reasoning_effort"),
+        ("[extract]\nfrom_pr = 'x'", "must be an int or null: extract.from_pr"),
+        ("[reports]\nhtml = 1", "must be a bool: reports.html"),
+    ],
+)
+def test_load_config_rejects_wrong_types(tmp_path: Path, toml: str, message: str) -> None:
+    path = tmp_path / "config.toml"
+    path.write_text(toml, encoding="utf-8")
+    with pytest.raises(ValueError, match=message):
+        load_config(path)
+
+
+def test_load_config_promotes_int_temperature(tmp_path: Path) -> None:
+    path = tmp_path / "config.toml"
+    path.write_text("[model]\ntemperature = 1", encoding="utf-8")
+    temperature = load_config(path).model.temperature
+    assert temperature == 1.0
+    assert isinstance(temperature, float)
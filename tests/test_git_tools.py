@@ -1,32 +1,36 @@
 from __future__ import annotations
 
+import os
 import shutil
 import subprocess
+import sys
+import time
 from pathlib import Path
+from types import ModuleType, SimpleNamespace
 
 import pytest
 
 from different_agent import git_tools
 
+# Resolved once: helpers run git many times per test, and some tests patch shutil.which.
+_GIT_BIN = shutil.which("git")
+_GIT_ENV = {
+    **os.environ,
+    "GIT_AUTHOR_NAME": "Test",
+    "GIT_COMMITTER_NAME": "Test",
+    "GIT_AUTHOR_EMAIL": "t@t",
+    "GIT_COMMITTER_EMAIL": "t@t",
+}
+
 
 def _git(repo: Path, args: list[str], **kwargs: object) -> subprocess.CompletedProcess[str]:
-    git = shutil.which("git")
-    assert git is not None
-    import os
-
-    env = {
-        **os.environ,
-        "GIT_AUTHOR_NAME": "Test",
-        "GIT_COMMITTER_NAME": "Test",
-        "GIT_AUTHOR_EMAIL": "t@t",
-        "GIT_COMMITTER_EMAIL": "t@t",
-    }
+    assert _GIT_BIN is not None
     return subprocess.run(
-        [git, *args],
+        [_GIT_BIN, *args],
         cwd=repo,
         check=True,
         capture_output=True,
-        env=env,
+        env=_GIT_ENV,
         **kwargs,  # type: ignore[arg-type]
     )
 
@@ -36,8 +40,25 @@ def _add_commit(repo: Path, filename: str, content: str, message: str) -> str:
     (repo / filename).write_text(content, encoding="utf-8")
     _git(repo, ["add", filename])
     _git(repo, ["commit", "-m", message])
-    out = _git(repo, ["rev-parse", "HEAD"], text=True)
-    return out.stdout.strip()
+    # Read the new sha from the branch ref instead of spawning `git rev-parse HEAD`; the test
+    # repos never pack their refs.
+    head = (repo / ".git" / "HEAD").read_text(encoding="utf-8").strip()
+    return (repo / ".git" / head.removeprefix("ref: ")).read_text(encoding="utf-8").strip()
+
+
+def test_git_show_tools_do_not_cache_movable_refs(git_repo: Path) -> None:
+    head_commit = {"repo_path": str(git_repo), "sha": "HEAD"}
+    head_file = {"repo_path": str(git_repo), "file_path": "file.txt"}
+    first = _add_commit(git_repo, "file.txt", "one\n", "first")
+    pinned_file = {**head_file, "ref": first}
+    assert git_tools.git_show_commit.invoke(head_commit)["sha"] == first
+    assert git_tools.git_show_file.invoke(head_file)["content"] == "one"
+    pinned = git_tools.git_show_file.invoke(pinned_file)
+
+    second = _add_commit(git_repo, "file.txt", "two\n", "second")
+    assert git_tools.git_show_commit.invoke(head_commit)["sha"] == second
+    assert git_tools.git_show_file.invoke(head_file)["content"] == "two"
+    assert git_tools.git_show_file.invoke(pinned_file) == pinned
 
 
 def test_git_recent_commits_returns_commits(git_repo: Path) -> None:
@@ -61,6 +82,43 @@ def test_git_show_commit_truncates_patch(git_repo: Path) -> None:
     assert "[patch truncated]" in result["patch"]
     assert git_tools.get_analyzed_commit_count() == 1
 
+    # A cache hit after a tally reset (as at the start of each cli run) still counts.
+    git_tools.reset_analyzed_commit_count()
+    git_tools.git_show_commit.invoke({"repo_path": str(git_repo), "sha": sha, "max_patch_lines": 1})
+    assert git_tools.get_analyzed_commit_count() == 1
+
+
+def test_git_show_commit_single_call_fields(git_repo: Path) -> None:
+    sha = _add_commit(git_repo, "file.txt", "line1\nfixed\n", "fix: thing\n\nLonger body\nline two")
+    result = git_tools.git_show_commit.invoke({"repo_path": str(git_repo), "sha": sha})
+    assert result["sha"] == sha
+    assert result["subject"] == "fix: thing"
+    assert result["body"].strip() == "Longer body\nline two"
+    assert result["files"] == [{"status": "M", "path": "file.txt"}]
+    assert result["patch"].startswith("diff --git a/file.txt b/file.txt")
+    assert result["patch_truncated"] is False
+
+
+def test_git_show_commit_ignores_diff_quoted_in_message(git_repo: Path) -> None:
+    quoted = "\n".join(["diff --git a/old b/old", *(f"-old {i}" for i in range(5))])
+    sha = _add_commit(git_repo, "file.txt", "reverted\n", f"Revert change\n\n{quoted}")
+    result = git_tools.git_show_commit.invoke(
+        {"repo_path": str(git_repo), "sha": sha, "max_patch_lines": 2}
+    )
+    assert result["body"].strip() == quoted
+    assert result["files"] == [{"status": "M", "path": "file.txt"}]
+    assert result["patch"].startswith("diff --git a/file.txt b/file.txt")
+    assert result["patch_truncated"] is True
+
+
+def test_git_show_file_joins_lines_without_trailing_newline(git_repo: Path) -> None:
+    sha = _add_commit(git_repo, "crlf.txt", "a\r\nb\r\n\r\nc\n", "crlf")
+    read = {"repo_path": str(git_repo), "file_path": "crlf.txt", "ref": sha}
+    assert git_tools.git_show_file.invoke(read)["content"] == "a\nb\n\nc"
+    result = git_tools.git_show_file.invoke({**read, "max_lines": 3})
+    assert result["content"] == "a\nb\n\n\n[file truncated]"
+    assert result["truncated"] is True
+
 
 def test_git_show_file_and_grep(git_repo: Path) -> None:
     content = git_tools.git_show_file.invoke(
@@ -164,3 +222,259 @@ def test_ast_grep_missing_binary(git_repo: Path, monkeypatch: pytest.MonkeyPatch
     assert result
     assert "error" in result[0]
     assert "not installed" in result[0]["error"]
+
+
+def test_ast_grep_streams_json_and_stops_at_max(
+    git_repo: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    fake = tmp_path / "ast-grep"
+    fake.write_text(
+        "#!/bin/sh\n"
+        'test "$3" = "--json=stream" || exit 2\n'
+        "i=1\n"
+        "while :; do\n"
+        '  echo "{\\"file\\": \\"f$i.py\\", \\"range\\": {\\"start\\": {\\"line\\": $i}}}"\n'
+        "  i=$((i+1))\n"
+        "done\n",
+        encoding="utf-8",
+    )
+    fake.chmod(0o755)
+    monkeypatch.setattr(shutil, "which", lambda _name: str(fake))
+    result = git_tools.ast_grep.invoke(
+        {"repo_path": str(git_repo), "pattern": "foo($A)", "max_matches": 3}
+    )
+    assert result == [
+        {"file": "f1.py", "line": 1, "text": ""},
+        {"file": "f2.py", "line": 2, "text": ""},
+        {"file": "f3.py", "line": 3, "text": ""},
+    ]
+
+    fake.write_text("#!/bin/sh\nexit 1\n", encoding="utf-8")
+    assert git_tools.ast_grep.invoke({"repo_path": str(git_repo), "pattern": "foo"}) == []
+
+
+def test_git_recent_commits_filter_likely_fixes(git_repo: Path) -> None:
+    _add_commit(git_repo, "file.txt", "a\n", "Fix buffer OVERFLOW in parser")
+    _add_commit(git_repo, "file.txt", "b\n", "Update README")
+
+    commits = git_tools.git_recent_commits.invoke(
+        {"repo_path": str(git_repo), "since_days": 1, "filter_likely_fixes": True}
+    )
+    assert [c["subject"] for c in commits] == ["Fix buffer OVERFLOW in parser"]
+
+    all_commits = git_tools.git_recent_commits.invoke({"repo_path": str(git_repo), "since_days": 1})
+    assert len(all_commits) == 3
+
+
+class _FakeGitError(Exception):
+    pass
+
+
+class _FakeBlob:
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+
+
+class _FakeRepository:
+    """Just enough of pygit2.Repository for the in-process fast paths."""
+
+    def __init__(self, path: str) -> None:
+        if not Path(path, ".git").exists():
+            raise _FakeGitError(path)
+        self.head = SimpleNamespace(target="head")
+        now = int(time.time())
+        self.commits = [
+            SimpleNamespace(
+                id="b" * 40,
+                commit_time=now,
+                author=SimpleNamespace(name="Dev", time=now, offset=120),
+                message="Wrapped subject\ncontinues here\n\nBody text\n",
+            ),
+            SimpleNamespace(id="a" * 40, commit_time=0, author=None, message="too old"),
+        ]
+
+    def walk(self, target: str, sort: int) -> list[SimpleNamespace]:
+        assert (target, sort) == ("head", 1)
+        return self.commits
+
+    def revparse_single(self, spec: str) -> object:
+        objects = {"HEAD:file.txt": _FakeBlob(b"one\ntwo\n"), "HEAD:.": object()}
+        if spec not in objects:
+            raise KeyError(spec)
+        return objects[spec]
+
+
+# A real module object, since the opened-repository cache is keyed on it.
+_FAKE_PYGIT2 = ModuleType("pygit2")
+_FAKE_PYGIT2.__dict__.update(
+    Repository=_FakeRepository, GitError=_FakeGitError, Blob=_FakeBlob, GIT_SORT_TIME=1
+)
+
+
+@pytest.fixture
+def fake_pygit2(monkeypatch: pytest.MonkeyPatch):
+    git_tools._open_pygit2_repo.cache_clear()
+    monkeypatch.setattr(git_tools, "_PYGIT2", _FAKE_PYGIT2)
+    yield _FAKE_PYGIT2
+    git_tools._open_pygit2_repo.cache_clear()
+
+
+@pytest.mark.usefixtures("fake_pygit2")
+def test_pygit2_fast_paths_with_fake_module(git_repo: Path, tmp_path: Path) -> None:
+    (commit,) = git_tools.git_recent_commits.invoke({"repo_path": str(git_repo), "since_days": 1})
+    assert commit["sha"] == "b" * 40
+    assert commit["author"] == "Dev"
+    assert commit["date"].endswith("+02:00")
+    assert commit["subject"] == "Wrapped subject continues here"
+
+    result = git_tools.git_show_file.invoke(
+        {"repo_path": str(git_repo), "file_path": "file.txt", "max_lines": 1}
+    )
+    assert result["content"] == "one\n\n[file truncated]"
+    assert git_tools._read_blob_pygit2(str(git_repo), "HEAD:.") is None
+    assert git_tools._read_blob_pygit2(str(git_repo), "HEAD:missing.txt") is None
+    assert git_tools._read_blob_pygit2(str(tmp_path), "HEAD:file.txt") is None
+
+
+@pytest.mark.skipif(git_tools._PYGIT2 is None, reason="pygit2 is not installed")
+def test_git_recent_commits_pygit2_matches_git(
+    git_repo: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    _add_commit(git_repo, "file.txt", "a\n", "Wrapped subject\ncontinues here\n\nBody text")
+
+    fast = git_tools._recent_commits_pygit2(str(git_repo), 1, 10)
+    monkeypatch.setattr(git_tools, "_PYGIT2", None)
+    slow = git_tools.git_recent_commits.invoke({"repo_path": str(git_repo), "since_days": 1})
+    assert fast is not None
+    assert sorted(fast, key=lambda c: c["sha"]) == sorted(slow, key=lambda c: c["sha"])
+    assert any(c["subject"] == "Wrapped subject continues here" for c in fast)
+
+
+@pytest.mark.skipif(git_tools._PYGIT2 is None, reason="pygit2 is not installed")
+def test_git_show_file_pygit2_matches_git(git_repo: Path) -> None:
+    first = _add_commit(git_repo, "file.txt", "one\ntwo\nthree\n", "edit")
+    _add_commit(git_repo, "file.txt", "changed\n", "edit again")
+
+    assert git_tools._read_blob_pygit2(str(git_repo), f"{first}:file.txt") == "one\ntwo\nthree\n"
+    assert git_tools._read_blob_pygit2(str(git_repo), "HEAD:.") is None
+    assert git_tools._read_blob_pygit2(str(git_repo), "HEAD:missing.txt") is None
+    result = git_tools.git_show_file.invoke(
+        {"repo_path": str(git_repo), "file_path": "file.txt", "ref": first, "max_lines": 2}
+    )
+    assert result["content"] == "one\ntwo\n\n[file truncated]"
+
+
+def test_git_show_commits_bulk(git_repo: Path) -> None:
+    first = _git(git_repo, ["rev-parse", "HEAD"], text=True).stdout.strip()
+    (git_repo / "new.txt").write_text("a\nb\nc\n", encoding="utf-8")
+    _git(git_repo, ["add", "new.txt"])
+    second = _add_commit(git_repo, "file.txt", "line1\nfixed\nline3\n", "fix: line2")
+
+    git_tools.reset_analyzed_commit_count()
+    commits = git_tools.git_show_commits_bulk.invoke(
+        {"repo_path": str(git_repo), "shas": [second, first], "max_patch_lines": 200}
+    )
+    assert [c["sha"] for c in commits] == [second, first]
+    assert commits[0]["subject"] == "fix: line2"
+    assert commits[0]["files"] == [
+        {"status": "M", "path": "file.txt"},
+        {"status": "A", "path": "new.txt"},
+    ]
+    assert commits[0]["patch"].startswith("diff --git a/file.txt b/file.txt")
+    assert "+fixed" in commits[0]["patch"]
+    assert commits[0]["patch_truncated"] is False
+    assert commits[1]["files"] == [{"status": "A", "path": "file.txt"}]
+    assert git_tools.get_analyzed_commit_count() == 2
+
+    truncated = git_tools.git_show_commits_bulk.invoke(
+        {"repo_path": str(git_repo), "shas": [second], "max_patch_lines": 2}
+    )
+    assert truncated[0]["patch_truncated"] is True
+    assert truncated[0]["patch"].endswith("[patch truncated]")
+
+
+def test_git_show_commits_bulk_flags_non_code_only(git_repo: Path) -> None:
+    code = _add_commit(git_repo, "file.txt", "changed\n", "tweak")
+    (git_repo / "docs").mkdir()
+    (git_repo / "tests").mkdir()
+    docs = _add_commit(git_repo, "docs/README.md", "docs\n", "docs")
+    tests = _add_commit(git_repo, "tests/test_file.py", "pass\n", "tests")
+
+    commits = git_tools.git_show_commits_bulk.invoke(
+        {"repo_path": str(git_repo), "shas": [code, docs, tests]}
+    )
+    assert [c["non_code_only"] for c in commits] == [False, True, True]
+    assert git_tools._NON_CODE_PATH_RE.search("pkg/foo_test.py")
+    assert git_tools._NON_CODE_PATH_RE.search(".github/workflows/ci.yml")
+    assert not git_tools._NON_CODE_PATH_RE.search("src/latest/main.py")
+
+    bad = git_tools.git_show_commits_bulk.invoke(
+        {"repo_path": str(git_repo), "shas": ["--output=/tmp/x"]}
+    )
+    assert "error" in bad[0]
+    assert git_tools.git_show_commits_bulk.invoke({"repo_path": str(git_repo), "shas": []}) == []
+
+
+def test_git_grep_literal_and_regex(git_repo: Path) -> None:
+    matches = git_tools.git_grep.invoke({"repo_path": str(git_repo), "pattern": "-line2"})
+    assert matches == []
+    matches = git_tools.git_grep.invoke(
+        {"repo_path": str(git_repo), "pattern": "line[23]", "fixed_string": False, "max_matches": 1}
+    )
+    assert matches == [{"path": "file.txt", "line": 2, "text": "line2"}]
+
+
+def test_git_grep_skips_untracked_files(git_repo: Path) -> None:
+    (git_repo / ".env").write_text("line2\n", encoding="utf-8")
+    matches = git_tools.git_grep.invoke({"repo_path": str(git_repo), "pattern": "line2"})
+    assert matches == [{"path": "file.txt", "line": 2, "text": "line2"}]
+
+
+def test_ensure_git_repo_memoizes_successes_only(git_repo: Path, tmp_path: Path) -> None:
+    git_tools._ensure_git_repo.cache_clear()
+    git_tools._ensure_git_repo(str(git_repo))
+    git_tools._ensure_git_repo(str(git_repo))
+    assert git_tools._ensure_git_repo.cache_info().hits == 1
+
+    missing = tmp_path / "later"
+    with pytest.raises(ValueError, match="Not a git repo"):
+        git_tools._ensure_git_repo(str(missing))
+    (missing / ".git").mkdir(parents=True)
+    git_tools._ensure_git_repo(str(missing))
+
+
+def test_truncate_lines() -> None:
+    assert git_tools._truncate_lines("a\nb\n", 2, "!") == ("a\nb\n", False)
+    assert git_tools._truncate_lines("a\nb", 2, "!") == ("a\nb", False)
+    assert git_tools._truncate_lines("a\nb\nc", 2, "!") == ("a\nb!", True)
+    assert git_tools._truncate_lines("", 1, "!") == ("", False)
+
+
+def test_stream_lines_stops_endless_output() -> None:
+    cmd = [sys.executable, "-c", "while True: print('y')"]
+    lines, truncated = git_tools._stream_lines(cmd, 3)
+    assert lines == ["y\n", "y\n", "y\n"]
+    assert truncated is True
+
+    with pytest.raises(subprocess.CalledProcessError):
+        git_tools._stream_lines([sys.executable, "-c", "raise SystemExit(2)"], 3)
+
+
+def test_stream_lines_survives_large_stderr() -> None:
+    # More than a pipe buffer of stderr before any stdout must not deadlock.
+    script = "import sys; sys.stderr.write('e' * 200_000); print('out'); sys.exit(1)"
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        git_tools._stream_lines([sys.executable, "-c", script], 3)
+    assert excinfo.value.output == "out\n"
+    assert len(excinfo.value.stderr) == 200_000
+
+
+def test_analyzed_commit_count_dedups_with_bounded_memory(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(git_tools, "_ANALYZED_RECENT_MAX", 2)
+    git_tools.reset_analyzed_commit_count()
+    for sha in ("a", "b", "a", "", "c", "d"):
+        git_tools._record_analyzed_commit(sha)
+    assert git_tools.get_analyzed_commit_count() == 4
+    assert list(git_tools._ANALYZED_COMMITS.recent) == ["c", "d"]
+    git_tools.reset_analyzed_commit_count()
+    assert git_tools.get_analyzed_commit_count() == 0
@@ -1,12 +1,28 @@
 from __future__ import annotations
 
+import http.client
+import threading
 import urllib.error
 import urllib.request
+from typing import ClassVar, cast
 
 import pytest
 
 from different_agent import github_tools as gh
 
+# Longer than the tools' body (12000) and comment (4000) limits, to exercise truncation.
+_LONG_BODY = "x" * 13000
+_LONG_COMMENT = "x" * 5000
+
+
+@pytest.fixture(autouse=True)
+def _reset_github_state():
+    gh.reset_analyzed_pr_count()
+    gh._ETAG_CACHE.clear()
+    yield
+    gh.reset_analyzed_pr_count()
+    gh._ETAG_CACHE.clear()
+
 
 def test_parse_github_repo_from_remote() -> None:
     ssh = gh._parse_github_repo_from_remote("git@github.com:owner/repo.git")
@@ -29,10 +45,7 @@ def test_iso_since_days_format() -> None:
 
 
 def test_git_github_repo_success(monkeypatch: pytest.MonkeyPatch) -> None:
-    class DummyResult:
-        stdout = "git@github.com:acme/widgets.git"
-
-    monkeypatch.setattr(gh, "_run_git", lambda _repo_path, _args: DummyResult)
+    monkeypatch.setattr(gh, "_run_git", lambda _repo_path, _args: "git@github.com:acme/widgets.git")
     assert gh.git_github_repo.invoke({"repo_path": "/home/test/repo"}) == {
         "owner": "acme",
         "repo": "widgets",
@@ -60,7 +73,6 @@ def test_github_recent_prs_range(monkeypatch: pytest.MonkeyPatch) -> None:
             "html_url": "https://example.com",
         }
 
-    gh.reset_analyzed_pr_count()
     monkeypatch.setattr(gh, "_github_request_json", fake_request)
     results = gh.github_recent_prs.invoke(
         {"owner": "acme", "repo": "widgets", "from_pr": 1, "to_pr": 2}
@@ -68,6 +80,39 @@ def test_github_recent_prs_range(monkeypatch: pytest.MonkeyPatch) -> None:
     assert [item["number"] for item in results] == [1, 2]
     assert gh.get_analyzed_pr_count() == 2
 
+    gh.reset_analyzed_pr_count()
+    monkeypatch.setattr(gh, "_github_request_json", None)
+    cached = gh.github_recent_prs.invoke(
+        {"owner": "acme", "repo": "widgets", "from_pr": 1, "to_pr": 2}
+    )
+    assert cached == results
+    assert gh.get_analyzed_pr_count() == 2
+
+
+def test_github_recent_prs_range_fetches_in_batches(monkeypatch: pytest.MonkeyPatch) -> None:
+    requested: list[int] = []
+
+    def fake_request(url: str) -> dict:
+        number = int(url.rsplit("/", 1)[1])
+        requested.append(number)
+        if number == 2:
+            raise urllib.error.HTTPError(url, 404, "not found", {}, None)
+        if number == 15:
+            raise RuntimeError("boom")
+        return {"number": number, "state": "closed", "labels": []}
+
+    monkeypatch.setattr(gh, "_github_request_json", fake_request)
+    results = gh.github_recent_prs.invoke(
+        {"owner": "acme", "repo": "widgets", "from_pr": 1, "to_pr": 100, "max_count": 3}
+    )
+    assert [item["number"] for item in results] == [1, 3, 4]
+    assert max(requested) <= gh._BULK_MAX_WORKERS
+
+    results = gh.github_recent_prs.invoke(
+        {"owner": "acme", "repo": "widgets", "from_pr": 11, "to_pr": 30, "max_count": 50}
+    )
+    assert results == [{"error": "GitHub request failed: boom"}]
+
 
 def test_github_recent_prs_range_errors() -> None:
     results = gh.github_recent_prs.invoke(
@@ -89,33 +134,75 @@ def test_github_recent_issues_filters_prs(monkeypatch: pytest.MonkeyPatch) -> No
     assert results[0]["number"] == 1
 
 
+def _pr_file(name: str) -> dict:
+    return {
+        "filename": name,
+        "status": "modified",
+        "additions": 1,
+        "deletions": 0,
+        "changes": 1,
+        "patch": "diff",
+    }
+
+
 def test_github_fetch_pr_files_paginates(monkeypatch: pytest.MonkeyPatch) -> None:
-    responses = [
-        [
-            {
-                "filename": "file.py",
-                "status": "modified",
-                "additions": 1,
-                "deletions": 0,
-                "changes": 1,
-                "patch": "diff",
-            }
-        ],
-        [],
-    ]
+    requested: list[str] = []
+    full_page = [_pr_file(f"file{i}.py") for i in range(100)]
+    # Pages past the end come back empty, as they do from GitHub.
+    pages = iter([full_page, [_pr_file("last.py")]])
 
-    def fake_request(_url: str):
-        return responses.pop(0)
+    def fake_request(url: str):
+        requested.append(url)
+        return next(pages, []), None
 
-    gh.reset_analyzed_pr_count()
-    monkeypatch.setattr(gh, "_github_request_json", fake_request)
+    monkeypatch.setattr(gh, "_github_request_json_with_link", fake_request)
     files = gh.github_fetch_pr_files.invoke(
-        {"owner": "acme", "repo": "widgets", "number": 12, "max_files": 5}
+        {"owner": "acme", "repo": "widgets", "number": 12, "max_files": 500}
+    )
+    assert len(files) == 101
+    assert files[-1]["filename"] == "last.py"
+    assert len(requested) == 2
+    assert gh.get_analyzed_pr_count() == 1
+
+    # A cache hit after a tally reset (as at the start of each cli run) still counts.
+    gh.reset_analyzed_pr_count()
+    gh.github_fetch_pr_files.invoke(
+        {"owner": "acme", "repo": "widgets", "number": 12, "max_files": 500}
     )
-    assert files[0]["filename"] == "file.py"
+    assert len(requested) == 2
     assert gh.get_analyzed_pr_count() == 1
 
 
+def test_github_fetch_pr_files_non_positive_max_files(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(gh, "_github_request_json_with_link", None)
+    files = gh.github_fetch_pr_files.invoke(
+        {"owner": "acme", "repo": "widgets", "number": 12, "max_files": 0}
+    )
+    assert files == []
+
+
+def test_github_fetch_pr_files_uses_link_header(monkeypatch: pytest.MonkeyPatch) -> None:
+    requested: list[int] = []
+    link = (
+        '<https://api.github.com/repositories/1/pulls/12/files?per_page=100&page=2>; rel="next", '
+        '<https://api.github.com/repositories/1/pulls/12/files?per_page=100&page=9>; rel="last"'
+    )
+
+    def fake_request(url: str):
+        page = int(url.rsplit("page=", 1)[1])
+        requested.append(page)
+        return [_pr_file(f"p{page}-{i}.py") for i in range(100)], link
+
+    monkeypatch.setattr(gh, "_github_request_json_with_link", fake_request)
+    files = gh.github_fetch_pr_files.invoke(
+        {"owner": "acme", "repo": "widgets", "number": 12, "max_files": 250}
+    )
+    assert sorted(requested) == [1, 2, 3]
+    assert len(files) == 250
+    assert files[100]["filename"] == "p2-0.py"
+    assert files[-1]["filename"] == "p3-49.py"
+
+
 def test_github_recent_prs_skips_not_found(monkeypatch: pytest.MonkeyPatch) -> None:
     def fake_request(url: str):
         raise urllib.error.HTTPError(url, 404, "not found", {}, None)
@@ -127,14 +214,143 @@ def test_github_recent_prs_skips_not_found(monkeypatch: pytest.MonkeyPatch) -> N
     assert results == []
 
 
-def test_github_request_json_sets_auth_header_and_parses_json(
+class FakeConnection:
+    instances: ClassVar[list[FakeConnection]] = []
+
+    def __init__(self, host: str, timeout: int) -> None:
+        self.host = host
+        self.timeout = timeout
+        self.requests: list[tuple[str, dict]] = []
+        self.responses: list[object] = []
+        self.closed = False
+        FakeConnection.instances.append(self)
+
+    def request(self, method: str, target: str, headers: dict) -> None:
+        assert method == "GET"
+        self.requests.append((target, headers))
+
+    def getresponse(self):
+        response = self.responses.pop(0) if self.responses else FakeHTTPResponse()
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeHTTPResponse:
+    def __init__(
+        self, status: int = 200, body: bytes = b'{"ok": true}', etag: str | None = None
+    ) -> None:
+        self.status = status
+        self.reason = "Not Found" if status == 404 else "OK"
+        self.headers = {"ETag": etag} if etag else {}
+        self.will_close = False
+        self._body = body
+
+    def read(self) -> bytes:
+        return self._body
+
+
+def _idle_connection() -> FakeConnection:
+    conn = gh._acquire_github_connection()
+    gh._release_github_connection(conn)
+    return cast(FakeConnection, conn)
+
+
+@pytest.fixture
+def fake_connection(monkeypatch: pytest.MonkeyPatch) -> type[FakeConnection]:
+    FakeConnection.instances = []
+    monkeypatch.setattr(gh, "_IDLE_CONNECTIONS", [])
+    monkeypatch.setattr(gh.http.client, "HTTPSConnection", FakeConnection)
+    monkeypatch.setattr(gh.urllib.request, "getproxies", dict)
+    return FakeConnection
+
+
+def test_github_request_json_reuses_connection(
+    monkeypatch: pytest.MonkeyPatch, fake_connection: type[FakeConnection]
+) -> None:
+    monkeypatch.setenv("GH_TOKEN", "fake-token")
+
+    assert gh._github_request_json("https://api.github.com/a?page=2") == {"ok": True}
+    assert gh._github_request_json("https://api.github.com/b") == {"ok": True}
+    (conn,) = fake_connection.instances
+    assert conn.host == "api.github.com"
+    assert [target for target, _ in conn.requests] == ["/a?page=2", "/b"]
+    assert conn.requests[0][1]["Authorization"] == "Bearer fake-token"
+
+
+def test_github_request_json_retries_stale_connection_and_raises_http_errors(
+    fake_connection: type[FakeConnection],
+) -> None:
+    _idle_connection().responses = [http.client.RemoteDisconnected("idle")]
+    assert gh._github_request_json("https://api.github.com/a") == {"ok": True}
+    stale, fresh = fake_connection.instances
+    assert stale.closed
+    assert not fresh.closed
+
+    fresh.responses = [FakeHTTPResponse(404, b"{}")]
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        gh._github_request_json("https://api.github.com/missing")
+    assert excinfo.value.code == 404
+
+
+@pytest.mark.usefixtures("fake_connection")
+def test_github_request_json_revalidates_with_etag(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(gh, "_ETAG_MAX_ENTRIES", 1)
+    conn = _idle_connection()
+    conn.responses = [
+        FakeHTTPResponse(body=b'[{"number": 1}]', etag='"v1"'),
+        FakeHTTPResponse(304, b""),
+        FakeHTTPResponse(body=b"{}", etag='"other"'),
+        FakeHTTPResponse(body=b'[{"number": 2}]', etag='"v2"'),
+    ]
+
+    assert gh._github_request_json("https://api.github.com/a") == [{"number": 1}]
+    assert gh._github_request_json("https://api.github.com/a") == [{"number": 1}]
+    assert conn.requests[1][1]["If-None-Match"] == '"v1"'
+
+    # Only one entry fits, so /b evicts /a and the next request is unconditional.
+    gh._github_request_json("https://api.github.com/b")
+    assert gh._github_request_json("https://api.github.com/a") == [{"number": 2}]
+    assert "If-None-Match" not in conn.requests[3][1]
+
+
+def test_github_connections_outlive_worker_threads(
+    monkeypatch: pytest.MonkeyPatch, fake_connection: type[FakeConnection]
+) -> None:
+    monkeypatch.setattr(gh, "_BULK_MAX_WORKERS", 1)
+    worker = threading.Thread(target=gh._github_request_json, args=("https://api.github.com/a",))
+    worker.start()
+    worker.join()
+    gh._github_request_json("https://api.github.com/b")
+    (conn,) = fake_connection.instances
+    assert [target for target, _ in conn.requests] == ["/a", "/b"]
+
+    # Connections beyond the idle cap are closed instead of kept.
+    first, second = gh._acquire_github_connection(), gh._acquire_github_connection()
+    gh._release_github_connection(first)
+    gh._release_github_connection(second)
+    assert first is conn
+    assert not first.closed
+    assert second.closed
+    (idle,) = gh._IDLE_CONNECTIONS
+    assert idle is conn
+
+
+def test_github_request_json_uses_urllib_off_api_host(
     monkeypatch: pytest.MonkeyPatch,
+    fake_connection: type[FakeConnection],
 ) -> None:
     monkeypatch.setenv("GH_TOKEN", "fake-token")
 
     seen: dict[str, object] = {}
 
     class FakeResponse:
+        def __init__(self) -> None:
+            self.headers = {"Link": None}
+
         def __enter__(self):
             return self
 
@@ -149,27 +365,31 @@ def test_github_request_json_sets_auth_header_and_parses_json(
         return FakeResponse()
 
     monkeypatch.setattr(gh.urllib.request, "urlopen", fake_urlopen)
-    assert gh._github_request_json("https://api.github.com/test") == {"ok": True}
+    assert gh._github_request_json("https://example.com/api/test") == {"ok": True}
     assert seen["auth"] == "Bearer fake-token"
+    assert fake_connection.instances == []
 
 
 def test_record_analyzed_pr_ignores_invalid_inputs() -> None:
-    gh.reset_analyzed_pr_count()
     gh._record_analyzed_pr(None, "repo", 1)
     gh._record_analyzed_pr("owner", "", 1)
     gh._record_analyzed_pr("owner", "repo", None)
     assert gh.get_analyzed_pr_count() == 0
 
 
+def test_record_analyzed_pr_dedupes_per_repo() -> None:
+    gh._record_analyzed_pr("owner", "repo", 1)
+    gh._record_analyzed_pr("owner", "repo", 1)
+    gh._record_analyzed_pr("owner", "other", 1)
+    assert gh.get_analyzed_pr_count() == 2
+
+
 def test_parse_github_repo_from_remote_empty() -> None:
     assert gh._parse_github_repo_from_remote("   ") is None
 
 
 def test_git_github_repo_parse_error(monkeypatch: pytest.MonkeyPatch) -> None:
-    class DummyResult:
-        stdout = "https://gitlab.com/acme/widgets"
-
-    monkeypatch.setattr(gh, "_run_git", lambda _repo_path, _args: DummyResult)
+    monkeypatch.setattr(gh, "_run_git", lambda _repo_path, _args: "https://gitlab.com/acme/widgets")
     result = gh.git_github_repo.invoke({"repo_path": "/home/test/repo"})
     assert "error" in result
 
@@ -177,14 +397,6 @@ def test_git_github_repo_parse_error(monkeypatch: pytest.MonkeyPatch) -> None:
 def test_github_recent_prs_non_range_filters_by_since_days(monkeypatch: pytest.MonkeyPatch) -> None:
     def fake_request(_url: str) -> list[dict]:
         return [
-            {
-                "number": 1,
-                "title": "Old PR",
-                "state": "closed",
-                "merged_at": None,
-                "updated_at": "1970-01-01T00:00:00Z",
-                "html_url": "https://example.com/1",
-            },
             {
                 "number": 2,
                 "title": "New PR",
@@ -201,9 +413,32 @@ def test_github_recent_prs_non_range_filters_by_since_days(monkeypatch: pytest.M
                 "updated_at": None,
                 "html_url": "https://example.com/3",
             },
+            {
+                "number": 4,
+                "title": "Old merge, recent comment",
+                "state": "closed",
+                "merged_at": "1970-01-01T00:00:00Z",
+                "updated_at": "2998-01-01T00:00:00Z",
+                "html_url": "https://example.com/4",
+            },
+            {
+                "number": 1,
+                "title": "Old PR",
+                "state": "closed",
+                "merged_at": None,
+                "updated_at": "1970-01-01T00:00:00Z",
+                "html_url": "https://example.com/1",
+            },
+            {
+                "number": 5,
+                "title": "Past the cutoff",
+                "state": "closed",
+                "merged_at": None,
+                "updated_at": "2999-01-01T00:00:00Z",
+                "html_url": "https://example.com/5",
+            },
         ]
 
-    gh.reset_analyzed_pr_count()
     monkeypatch.setattr(gh, "_github_request_json", fake_request)
     results = gh.github_recent_prs.invoke(
         {"owner": "acme", "repo": "widgets", "since_days": 1, "max_count": 10}
@@ -212,19 +447,32 @@ def test_github_recent_prs_non_range_filters_by_since_days(monkeypatch: pytest.M
     assert gh.get_analyzed_pr_count() == 2
 
 
-def test_github_recent_issues_error_non_list(monkeypatch: pytest.MonkeyPatch) -> None:
-    monkeypatch.setattr(gh, "_github_request_json", lambda _url: {"nope": True})
-    results = gh.github_recent_issues.invoke({"owner": "acme", "repo": "widgets"})
-    assert results[0]["error"] == "Unexpected response from GitHub issues API"
-
-
-def test_github_recent_issues_error_exception(monkeypatch: pytest.MonkeyPatch) -> None:
-    def boom(_url: str):
-        raise RuntimeError("boom")
-
-    monkeypatch.setattr(gh, "_github_request_json", boom)
-    results = gh.github_recent_issues.invoke({"owner": "acme", "repo": "widgets"})
-    assert "error" in results[0]
+def _boom(_url: str):
+    raise RuntimeError("boom")
+
+
+@pytest.mark.parametrize(
+    ("tool", "args", "fake_request", "error"),
+    [
+        (
+            gh.github_recent_issues,
+            {},
+            lambda _url: ({"nope": True}, None),
+            "Unexpected response from GitHub issues API",
+        ),
+        (gh.github_recent_issues, {}, _boom, "GitHub request failed: boom"),
+        (gh.github_fetch_pr_files, {"number": 12}, _boom, "GitHub request failed: boom"),
+        (gh.github_fetch_pr_comments, {"number": 10}, _boom, "GitHub request failed: boom"),
+    ],
+    ids=["issues-non-list", "issues-exception", "pr-files-exception", "pr-comments-exception"],
+)
+def test_github_list_tools_report_errors(
+    monkeypatch: pytest.MonkeyPatch, tool, args: dict, fake_request, error: str
+) -> None:
+    # Every GitHub request goes through _github_request_json_with_link.
+    monkeypatch.setattr(gh, "_github_request_json_with_link", fake_request)
+    results = tool.invoke({"owner": "acme", "repo": "widgets", **args})
+    assert results == [{"error": error}]
 
 
 def test_github_fetch_issue_success_and_error(monkeypatch: pytest.MonkeyPatch) -> None:
@@ -237,7 +485,7 @@ def test_github_fetch_issue_success_and_error(monkeypatch: pytest.MonkeyPatch) -
             "closed_at": None,
             "updated_at": None,
             "html_url": "https://example.com",
-            "body": "x" * 13000,
+            "body": _LONG_BODY,
         }
 
     monkeypatch.setattr(gh, "_github_request_json", ok)
@@ -263,7 +511,7 @@ def test_github_fetch_pr_success_and_error(monkeypatch: pytest.MonkeyPatch) -> N
             "merged_at": None,
             "updated_at": None,
             "html_url": "https://example.com",
-            "body": "x" * 13000,
+            "body": _LONG_BODY,
         },
     )
     pr = gh.github_fetch_pr.invoke({"owner": "acme", "repo": "widgets", "number": 12})
@@ -272,26 +520,17 @@ def test_github_fetch_pr_success_and_error(monkeypatch: pytest.MonkeyPatch) -> N
     assert len(pr["body"]) == 12000
 
     monkeypatch.setattr(gh, "_github_request_json", lambda _url: ["nope"])
-    error = gh.github_fetch_pr.invoke({"owner": "acme", "repo": "widgets", "number": 12})
+    error = gh.github_fetch_pr.invoke({"owner": "acme", "repo": "widgets", "number": 13})
     assert "error" in error
 
 
-def test_github_fetch_pr_files_error(monkeypatch: pytest.MonkeyPatch) -> None:
-    def boom(_url: str):
-        raise RuntimeError("boom")
-
-    monkeypatch.setattr(gh, "_github_request_json", boom)
-    results = gh.github_fetch_pr_files.invoke({"owner": "acme", "repo": "widgets", "number": 12})
-    assert "error" in results[0]
-
-
 def test_github_fetch_pr_comments(monkeypatch: pytest.MonkeyPatch) -> None:
     def fake_request(url: str) -> list[dict]:
         if "/pulls/" in url and "/comments" in url:
             return [
                 {
                     "user": {"login": "alice"},
-                    "body": "review comment " + "x" * 5000,
+                    "body": "review comment " + _LONG_COMMENT,
                     "created_at": "2024-01-01T00:00:00Z",
                     "path": "src/main.py",
                     "line": 42,
@@ -319,10 +558,20 @@ def test_github_fetch_pr_comments(monkeypatch: pytest.MonkeyPatch) -> None:
     assert comments[1]["line"] is None
 
 
-def test_github_fetch_pr_comments_error(monkeypatch: pytest.MonkeyPatch) -> None:
-    def boom(_url: str):
-        raise RuntimeError("boom")
+def test_github_fetch_prs_bulk_preserves_order_and_errors(monkeypatch: pytest.MonkeyPatch) -> None:
+    def fake_request(url: str) -> dict:
+        number = int(url.rsplit("/", 1)[1])
+        if number == 2:
+            raise RuntimeError("boom")
+        return {"number": number, "title": f"PR {number}", "state": "closed", "labels": []}
 
-    monkeypatch.setattr(gh, "_github_request_json", boom)
-    result = gh.github_fetch_pr_comments.invoke({"owner": "acme", "repo": "widgets", "number": 10})
-    assert "error" in result[0]
+    monkeypatch.setattr(gh, "_github_request_json", fake_request)
+    results = gh.github_fetch_prs_bulk.invoke(
+        {"owner": "acme", "repo": "widgets", "numbers": [3, 2, 1]}
+    )
+    assert results[0]["number"] == 3
+    assert "error" in results[1]
+    assert results[2]["number"] == 1
+    assert (
+        gh.github_fetch_prs_bulk.invoke({"owner": "acme", "repo": "widgets", "numbers": []}) == []
+    )
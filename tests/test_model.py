@@ -12,9 +12,36 @@ from different_agent.model import (
 )
 
 
+class _DummyOpenAIChat:
+    def __init__(
+        self,
+        model_name: str,
+        temperature: float,
+        reasoning_effort: str | None = None,
+        model_kwargs: dict | None = None,
+    ):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.reasoning_effort = reasoning_effort
+        self.model_kwargs = model_kwargs
+
+
+class _DummyAnthropicChat:
+    def __init__(self, model_name: str, temperature: float, max_tokens: int):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+
+# Stand-ins for the provider packages, installed into sys.modules per test.
+_FAKE_OPENAI = types.SimpleNamespace(ChatOpenAI=_DummyOpenAIChat)
+_FAKE_ANTHROPIC = types.SimpleNamespace(ChatAnthropic=_DummyAnthropicChat)
+
+
 def test_strip_provider_prefix() -> None:
     assert _strip_provider_prefix("openai:gpt-5") == "gpt-5"
     assert _strip_provider_prefix("gpt-5") == "gpt-5"
+    assert _strip_provider_prefix("azure:gpt-5") == "azure:gpt-5"
 
 
 def test_detect_provider_prefers_prefix() -> None:
@@ -39,16 +66,7 @@ def test_create_chat_model_openai_requires_key(monkeypatch: pytest.MonkeyPatch)
 
 
 def test_create_chat_model_openai_success(monkeypatch: pytest.MonkeyPatch) -> None:
-    class DummyChat:
-        def __init__(
-            self, model_name: str, temperature: float, reasoning_effort: str | None = None
-        ):
-            self.model_name = model_name
-            self.temperature = temperature
-            self.reasoning_effort = reasoning_effort
-
-    dummy_module = types.SimpleNamespace(ChatOpenAI=DummyChat)
-    monkeypatch.setitem(sys.modules, "langchain_openai", dummy_module)
+    monkeypatch.setitem(sys.modules, "langchain_openai", _FAKE_OPENAI)
     monkeypatch.setenv("OPENAI_API_KEY", "ok")
 
     resolved = create_chat_model(
@@ -59,19 +77,13 @@ def test_create_chat_model_openai_success(monkeypatch: pytest.MonkeyPatch) -> No
     )
     assert resolved.provider == "openai"
     assert resolved.name == "gpt-5.2"
-    assert isinstance(resolved.model, DummyChat)
+    assert isinstance(resolved.model, _DummyOpenAIChat)
     assert resolved.model.model_name == "gpt-5.2"
+    assert resolved.model.model_kwargs == {"prompt_cache_key": "different-agent"}
 
 
 def test_create_chat_model_anthropic_success(monkeypatch: pytest.MonkeyPatch) -> None:
-    class DummyChat:
-        def __init__(self, model_name: str, temperature: float, max_tokens: int):
-            self.model_name = model_name
-            self.temperature = temperature
-            self.max_tokens = max_tokens
-
-    dummy_module = types.SimpleNamespace(ChatAnthropic=DummyChat)
-    monkeypatch.setitem(sys.modules, "langchain_anthropic", dummy_module)
+    monkeypatch.setitem(sys.modules, "langchain_anthropic", _FAKE_ANTHROPIC)
     monkeypatch.setenv("ANTHROPIC_API_KEY", "ok")
 
     resolved = create_chat_model(
@@ -82,4 +94,4 @@ def test_create_chat_model_anthropic_success(monkeypatch: pytest.MonkeyPatch) ->
     )
     assert resolved.provider == "anthropic"
     assert resolved.name == "claude-sonnet"
-    assert isinstance(resolved.model, DummyChat)
+    assert isinstance(resolved.model, _DummyAnthropicChat)
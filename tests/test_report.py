@@ -1,41 +1,67 @@
 from __future__ import annotations
 
+from types import MappingProxyType
+
+import pytest
+
 from different_agent.report import render_findings_html, render_target_assessment_html
 
+# Read-only sample rows paired with the escaped fragments each must render to.
+_FINDINGS_FIXTURES: tuple[tuple[MappingProxyType, tuple[str, ...]], ...] = (
+    (
+        MappingProxyType(
+            {
+                "id": "<f-1>",
+                "kind": "bug",
+                "severity": "high",
+                "title": "Title & stuff",
+                "main_file": "src/<main>.py",
+                "exploit_risk": "<high>",
+                "root_cause": "a < b",
+                "fix_summary": "use & sanitize",
+            }
+        ),
+        (
+            "&lt;f-1&gt;",
+            "Title &amp; stuff",
+            "src/&lt;main&gt;.py",
+            "&lt;high&gt;",
+            "a &lt; b",
+            "use &amp; sanitize",
+        ),
+    ),
+)
+
+_ASSESSMENT_FIXTURES: tuple[tuple[MappingProxyType, tuple[str, ...]], ...] = (
+    (
+        MappingProxyType(
+            {
+                "finding_id": "F&1",
+                "applies": True,
+                "confidence": 0.75,
+                "why": "<because>",
+            }
+        ),
+        ("F&amp;1", "&lt;because&gt;"),
+    ),
+)
 
-def test_render_findings_html_escapes_values() -> None:
-    findings = [
-        {
-            "id": "<f-1>",
-            "kind": "bug",
-            "severity": "high",
-            "title": "Title & stuff",
-            "main_file": "src/<main>.py",
-            "exploit_risk": "<high>",
-            "root_cause": "a < b",
-            "fix_summary": "use & sanitize",
-        }
-    ]
-    html = render_findings_html(findings)
+
+@pytest.mark.parametrize(("finding", "expected"), _FINDINGS_FIXTURES)
+def test_render_findings_html_escapes_values(
+    finding: MappingProxyType, expected: tuple[str, ...]
+) -> None:
+    html = render_findings_html([finding])
     assert "Findings" in html
-    assert "&lt;f-1&gt;" in html
-    assert "Title &amp; stuff" in html
-    assert "src/&lt;main&gt;.py" in html
-    assert "&lt;high&gt;" in html
-    assert "a &lt; b" in html
-    assert "use &amp; sanitize" in html
-
-
-def test_render_target_assessment_html_escapes_values() -> None:
-    assessments = [
-        {
-            "finding_id": "F&1",
-            "applies": True,
-            "confidence": 0.75,
-            "why": "<because>",
-        }
-    ]
-    html = render_target_assessment_html(assessments)
+    for fragment in expected:
+        assert fragment in html
+
+
+@pytest.mark.parametrize(("assessment", "expected"), _ASSESSMENT_FIXTURES)
+def test_render_target_assessment_html_escapes_values(
+    assessment: MappingProxyType, expected: tuple[str, ...]
+) -> None:
+    html = render_target_assessment_html([assessment])
     assert "Target Assessment" in html
-    assert "F&amp;1" in html
-    assert "&lt;because&gt;" in html
+    for fragment in expected:
+        assert fragment in html
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import pytest
+
+from different_agent import tool_cache
+
+
+def test_cached_tool_memoizes_and_copies() -> None:
+    calls: list[int] = []
+
+    @tool_cache.cached_tool()
+    def fetch(number: int) -> dict:
+        calls.append(number)
+        return {"number": number, "labels": []}
+
+    first = fetch(1)
+    first["labels"].append("mutated")
+    assert fetch(1) == {"number": 1, "labels": []}
+    assert fetch(number=2)["number"] == 2
+    assert calls == [1, 2]
+
+    tool_cache.clear_tool_caches()
+    fetch(1)
+    assert calls == [1, 2, 1]
+
+
+def test_cached_tool_skips_errors_and_unhashable_args() -> None:
+    calls: list[object] = []
+
+    @tool_cache.cached_tool()
+    def fetch(value: object) -> list[dict]:
+        calls.append(value)
+        return [{"error": "boom"}]
+
+    fetch(1)
+    fetch(1)
+    fetch([1])
+    fetch([1])
+    assert len(calls) == 4
+
+
+def test_cached_tool_expires_after_ttl(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [100.0]
+    monkeypatch.setattr(tool_cache.time, "monotonic", lambda: now[0])
+    calls: list[int] = []
+
+    @tool_cache.cached_tool(ttl=60)
+    def fetch(number: int) -> int:
+        calls.append(number)
+        return number
+
+    fetch(1)
+    now[0] = 159.0
+    fetch(1)
+    now[0] = 161.0
+    fetch(1)
+    assert calls == [1, 1]
+
+
+def test_cached_tool_cache_if_sees_defaults() -> None:
+    calls: list[str] = []
+
+    @tool_cache.cached_tool(cache_if=lambda arguments: arguments["ref"] != "HEAD")
+    def fetch(path: str, ref: str = "HEAD") -> str:
+        calls.append(ref)
+        return path
+
+    fetch("a")
+    fetch("a", ref="HEAD")
+    fetch("a", ref="v1")
+    fetch("a", ref="v1")
+    assert calls == ["HEAD", "HEAD", "v1"]
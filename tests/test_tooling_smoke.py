@@ -1,26 +1,36 @@
 from __future__ import annotations
 
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
 
+COMMANDS = [
+    ["ruff", "check", "."],
+    ["ty", "check", "src/"],
+]
 
-def _run(cmd: list[str]) -> None:
-    result = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True, check=False)
+
+def _run(cmd: list[str]) -> str | None:
+    """Run `cmd` from the repo root; return failure details, or None on success."""
+    result = subprocess.run(cmd, cwd=ROOT, capture_output=True, check=False)
     if result.returncode == 0:
-        return
-    details = "\n".join(
+        return None
+    # Output is only decoded when there is a failure to report.
+    return "\n".join(
         [
             f"command: {' '.join(cmd)}",
             f"exit_code: {result.returncode}",
-            f"stdout:\n{result.stdout}",
-            f"stderr:\n{result.stderr}",
+            f"stdout:\n{result.stdout.decode(errors='replace')}",
+            f"stderr:\n{result.stderr.decode(errors='replace')}",
         ]
     ).strip()
-    raise AssertionError(details)
 
 
 def test_tooling_smoke() -> None:
-    _run(["ruff", "check", "."])
-    _run(["ty", "check", "src/"])
+    # The tools are independent, so run them side by side and report every failure.
+    with ThreadPoolExecutor(max_workers=len(COMMANDS)) as pool:
+        failures = [details for details in pool.map(_run, COMMANDS) if details]
+    if failures:
+        raise AssertionError("\n\n".join(failures))